@@ -1,15 +1,43 @@
+import condition
+
 import hashlib
+import heapq
 import math
-import random
 import re
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class Agent:
+    # Fixed attribute layout keeps agents retained through social networks compact
+    __slots__ = ("age", "agentStore", "aggressionFactor", "aggressionFactorModifier", "alive", "baseInterestRate", "born", "causeOfDeath", "cell",
+                 "cellRange", "cellsInRange", "childEndowmentHashes", "combatWithControlGroup", "combatWithExperimentalGroup",
+                 "conflictHappiness", "debug", "decisionModel", "decisionModelFactor", "decisionModelLookaheadDiscount",
+                 "decisionModelLookaheadFactor", "decisionModelTribalFactor", "depressed", "depressionFactor", "diseaseDeath",
+                 "diseaseProtectionChance", "diseases", "diseaseWithControlGroup", "diseaseWithExperimentalGroup", "familyHappiness",
+                 "fertile", "fertilityAge", "fertilityFactor", "fertilityFactorModifier", "follower", "friendlinessModifier",
+                 "happiness", "happinessModifier", "happinessUnit", "healthHappiness", "ID", "immuneSystem", "immuneSystemBits",
+                 "infertilityAge", "inheritancePolicy", "lastDoneCombat", "lastMoved", "lastMoveOptimal", "lastReproduced", "lastSpice",
+                 "lastSugar", "lastTimeToLive", "lastUniversalSpiceIncomeTimestep", "lastUniversalSugarIncomeTimestep", "leader",
+                 "lendingFactor", "lendingWithControlGroup", "lendingWithExperimentalGroup", "loanDuration", "lookaheadFactor",
+                 "marginalRateOfSubstitution", "maxAge", "maxFriends", "movement", "movementMode", "movementModifier", "neighborhood",
+                 "neighborhoodMode", "neighbors", "nice", "random", "rangeCell", "reproductionWithControlGroup",
+                 "reproductionWithExperimentalGroup", "seed", "selfishnessFactor", "sex", "socialHappiness", "socialNetwork", "spice",
+                 "spiceMeanIncome", "spiceMetabolism", "spiceMetabolismModifier", "spicePrice", "startingImmuneSystem", "startingSpice",
+                 "startingSugar", "storeIndex", "sugar", "sugarMeanIncome", "sugarMetabolism", "sugarMetabolismModifier", "sugarPrice", "tagBits",
+                 "tagging", "tagPreferences", "tags", "tagZeroes", "timestep", "timeToLive", "tradeBisection", "tradeFactor", "tradeVolume",
+                 "tradeWithControlGroup", "tradeWithExperimentalGroup", "tribe", "universalSpice", "universalSugar", "vision",
+                 "visionMode", "visionModifier", "wealthHappiness", "welfareKey", "welfarePreferences")
+
     def __init__(self, agentID, birthday, cell, configuration):
         self.ID = agentID
         self.born = birthday
         self.cell = cell
         self.debug = cell.environment.sugarscape.debug
+        self.random = cell.environment.sugarscape.random
 
         self.aggressionFactor = configuration["aggressionFactor"]
         self.baseInterestRate = configuration["baseInterestRate"]
@@ -48,6 +76,7 @@ class Agent:
         self.tagging = configuration["tagging"]
         self.tagPreferences = configuration["tagPreferences"]
         self.tags = configuration["tags"]
+        self.tradeBisection = configuration["tradeBisection"]
         self.tradeFactor = configuration["tradeFactor"]
         self.universalSpice = configuration["universalSpice"]
         self.universalSugar = configuration["universalSugar"]
@@ -55,9 +84,11 @@ class Agent:
         self.visionMode = configuration["visionMode"]
 
         self.age = 0
+        self.agentStore = None
         self.aggressionFactorModifier = 0
         self.alive = True
         self.causeOfDeath = None
+        self.cellRange = 0
         self.cellsInRange = []
         self.childEndowmentHashes = None
         self.conflictHappiness = 0
@@ -72,6 +103,7 @@ class Agent:
         self.happinessUnit = 1
         self.happinessModifier = 0
         self.healthHappiness = 0
+        self.immuneSystemBits = condition.findPackedBits(self.immuneSystem)
         self.lastDoneCombat = -1
         self.lastMoved = -1
         self.lastMoveOptimal = True
@@ -85,21 +117,26 @@ class Agent:
         self.neighborhood = []
         self.neighbors = []
         self.nice = 0
+        self.rangeCell = None
         self.socialHappiness = 0
         self.socialNetwork = {"father": None, "mother": None, "children": [], "friends": [], "creditors": [], "debtors": [], "mates": []}
         self.spiceMeanIncome = 1
         self.spiceMetabolismModifier = 0
         self.spicePrice = 0
+        self.storeIndex = None
         self.sugarMeanIncome = 1
         self.sugarMetabolismModifier = 0
         self.sugarPrice = 0
-        self.tagZeroes = 0
+        self.tagBits = condition.findPackedBits(self.tags)
+        self.tagZeroes = self.tags.count(0) if self.tags != None else 0
         self.timestep = birthday
         self.timeToLive = 0
         self.tradeVolume = 0
         self.tribe = self.findTribe()
         self.visionModifier = 0
         self.wealthHappiness = 0
+        self.welfareKey = None
+        self.welfarePreferences = None
 
         self.combatWithControlGroup = 0
         self.combatWithExperimentalGroup = 0
@@ -221,6 +258,7 @@ class Agent:
             self.cell.doSpiceProductionPollution(spiceCollected)
         self.cell.resetSugar()
         self.cell.resetSpice()
+        self.cell.environment.updateCellNeighborWealth(self.cell)
 
     def defaultOnLoan(self, loan):
         for creditor in self.socialNetwork["creditors"]:
@@ -278,7 +316,7 @@ class Agent:
         self.diseases = []
 
     def doDisease(self):
-        random.shuffle(self.diseases)
+        self.random.shuffle(self.diseases)
         for diseaseRecord in self.diseases:
             disease = diseaseRecord["disease"]
             if diseaseRecord["caught"] != self.timestep and diseaseRecord["incubation"] > 0:
@@ -292,12 +330,15 @@ class Agent:
             if diseaseTags != None:
                 immuneResponseStart = diseaseRecord["startIndex"]
                 immuneResponseEnd = min(diseaseRecord["endIndex"] + 1, len(self.immuneSystem))
-                immuneResponse = self.immuneSystem[immuneResponseStart:immuneResponseEnd]
-                for i in range(len(immuneResponse)):
-                    if immuneResponse[i] != diseaseTags[i]:
-                        self.immuneSystem[immuneResponseStart + i] = diseaseTags[i]
-                        break
-                if diseaseTags == immuneResponse:
+                immuneResponseLength = immuneResponseEnd - immuneResponseStart
+                immuneResponseMask = (1 << immuneResponseLength) - 1
+                mismatchedBits = ((self.immuneSystemBits >> immuneResponseStart) ^ disease.tagBits) & immuneResponseMask
+                # Flip the first mismatched bit of the immune response toward the disease tags
+                if mismatchedBits != 0:
+                    position = immuneResponseStart + (mismatchedBits & -mismatchedBits).bit_length() - 1
+                    self.immuneSystem[position] = diseaseTags[position - immuneResponseStart]
+                    self.immuneSystemBits ^= 1 << position
+                if mismatchedBits == 0 and immuneResponseLength == len(diseaseTags):
                     self.diseases.remove(diseaseRecord)
                     disease.recover(self)
 
@@ -310,9 +351,9 @@ class Agent:
             neighbor = neighborCell.agent
             if neighbor != None and neighbor.isAlive() == True:
                 neighbors.append(neighbor)
-        random.shuffle(neighbors)
+        self.random.shuffle(neighbors)
         for neighbor in neighbors:
-            neighbor.catchDisease(self.diseases[random.randrange(diseaseCount)]["disease"], self)
+            neighbor.catchDisease(self.diseases[self.random.randrange(diseaseCount)]["disease"], self)
             sugarscape = self.cell.environment.sugarscape
             if sugarscape.experimentalGroup != None and neighbor.isInGroup(sugarscape.experimentalGroup):
                 self.diseaseWithExperimentalGroup += 1
@@ -320,8 +361,8 @@ class Agent:
                 self.diseaseWithControlGroup += 1
 
     def doInfectionAttempt(self, disease):
-        diseaseAttack = random.uniform(0.0, 1.0)
-        immuneDefense = random.uniform(0.0, 1.0)
+        diseaseAttack = self.random.uniform(0.0, 1.0)
+        immuneDefense = self.random.uniform(0.0, 1.0)
         attackSuccess = True if diseaseAttack <= disease.transmissionChance and disease.transmissionChance != 0.0 else False
         defenseSuccess = True if immuneDefense <= self.diseaseProtectionChance and self.diseaseProtectionChance != 0.0 else False
         if attackSuccess == True and defenseSuccess == False:
@@ -400,7 +441,7 @@ class Agent:
                 continue
             elif neighbor.isBorrower() == True:
                 borrowers.append(neighbor)
-        random.shuffle(borrowers)
+        self.random.shuffle(borrowers)
         spiceMetabolism = self.findSpiceMetabolism()
         sugarMetabolism = self.findSugarMetabolism()
         for borrower in borrowers:
@@ -455,14 +496,14 @@ class Agent:
         if self.isAlive() == False or self.isFertile() == False:
             return
         neighborCells = list(self.cell.neighbors.values())
-        random.shuffle(neighborCells)
+        self.random.shuffle(neighborCells)
         emptyCells = self.findEmptyNeighborCells()
         for neighborCell in neighborCells:
             neighbor = neighborCell.agent
             if neighbor != None and neighbor.isAlive() == True:
                 neighborCompatibility = self.isNeighborReproductionCompatible(neighbor)
                 emptyCellsWithNeighbor = emptyCells + neighbor.findEmptyNeighborCells()
-                random.shuffle(emptyCellsWithNeighbor)
+                self.random.shuffle(emptyCellsWithNeighbor)
                 if self.isFertile() == True and neighborCompatibility == True and len(emptyCellsWithNeighbor) != 0:
                     emptyCell = emptyCellsWithNeighbor.pop()
                     while emptyCell.agent != None and len(emptyCellsWithNeighbor) != 0:
@@ -507,15 +548,18 @@ class Agent:
         if self.tags == None or self.isAlive() == False or self.tagging == False:
             return
         neighborCells = list(self.cell.neighbors.values())
-        random.shuffle(neighborCells)
+        self.random.shuffle(neighborCells)
         for neighborCell in neighborCells:
             neighbor = neighborCell.agent
             if neighbor != None:
-                position = random.randrange(len(self.tags))
+                position = self.random.randrange(len(self.tags))
                 neighbor.flipTag(position, self.tags[position])
                 neighbor.tribe = neighbor.findTribe()
 
-    def doTimestep(self, timestep):
+    def doTimestep(self, timestep, timer=None):
+        # Charge the time between agents, including agents skipped or dead before finishing, to overhead rather than the next movement
+        if timer != None:
+            timer.lap("agentOverhead")
         self.timestep = timestep
         # Prevent dead or already moved agent from moving
         if self.isAlive() == True and self.lastMoved != self.timestep:
@@ -526,26 +570,46 @@ class Agent:
             # Beginning of timestep actions
             self.moveToBestCell()
             self.updateNeighbors()
+            if timer != None:
+                timer.lap("agentMovement")
             # Middle of timestep actions
             self.collectResourcesAtCell()
             self.doUniversalIncome()
+            if timer != None:
+                timer.lap("agentCollection")
             self.doMetabolism()
+            if timer != None:
+                timer.lap("agentMetabolism")
             # If dead from metabolism, skip remainder of timestep
             if self.alive == False:
                 return
             self.doTagging()
+            if timer != None:
+                timer.lap("agentTagging")
             self.doTrading()
+            if timer != None:
+                timer.lap("agentTrading")
             self.doReproduction()
+            if timer != None:
+                timer.lap("agentReproduction")
             self.doLending()
+            if timer != None:
+                timer.lap("agentLending")
             # End of timestep actions
             self.doDisease()
+            if timer != None:
+                timer.lap("agentDisease")
             self.doAging()
+            if timer != None:
+                timer.lap("agentAging")
             # If dead from aging, skip remainder of timestep
             if self.alive == False:
                 return
             self.findCellsInRange()
             self.updateHappiness()
             self.updateValues()
+            if timer != None:
+                timer.lap("agentHappiness")
 
     def doTrading(self):
         # If not a trader, skip trading
@@ -563,79 +627,12 @@ class Agent:
                 neighborMRS = neighbor.marginalRateOfSubstitution
                 if neighborMRS != self.marginalRateOfSubstitution:
                     traders.append(neighbor)
-        random.shuffle(traders)
+        self.random.shuffle(traders)
         for trader in traders:
-            spiceSeller = None
-            sugarSeller = None
-            tradeFlag = True
-            transactions = 0
-
-            while tradeFlag == True:
-                traderMRS = trader.marginalRateOfSubstitution
-                # If both trying to sell the same commodity, stop trading
-                if self.canTradeWithNeighbor(trader) == False:
-                    tradeFlag = False
-                    continue
-
-                # MRS > 1 indicates the agent has less need of spice and should become the spice seller
-                if traderMRS > self.marginalRateOfSubstitution:
-                    spiceSeller = trader
-                    sugarSeller = self
-                else:
-                    spiceSeller = self
-                    sugarSeller = trader
-                spiceSellerMRS = spiceSeller.marginalRateOfSubstitution
-                sugarSellerMRS = sugarSeller.marginalRateOfSubstitution
-
-                if spiceSellerMRS < 0 or sugarSellerMRS < 0:
-                    spiceSeller = None
-                    sugarSeller = None
-                    break
-
-                # Find geometric mean of spice and sugar seller MRS for trade price
-                tradePrice = math.sqrt(spiceSellerMRS * sugarSellerMRS)
-                sugarPrice = 0
-                spicePrice = 0
-                # Set proper highest value commodity based on trade price
-                if tradePrice < 1:
-                    spicePrice = 1
-                    sugarPrice = tradePrice
-                else:
-                    spicePrice = tradePrice
-                    sugarPrice = 1
-
-                # If trade would be lethal, skip it
-                if spiceSeller.spice - spicePrice < spiceSeller.spiceMetabolism or sugarSeller.sugar - sugarPrice < sugarSeller.sugarMetabolism:
-                    tradeFlag = False
-                    continue
-                spiceSellerNewMRS = spiceSeller.findNewMarginalRateOfSubstitution(spiceSeller.sugar + sugarPrice, spiceSeller.spice - spicePrice)
-                sugarSellerNewMRS = sugarSeller.findNewMarginalRateOfSubstitution(sugarSeller.sugar - sugarPrice, sugarSeller.spice + spicePrice)
-
-                # Calculate absolute difference from perfect spice/sugar parity in MRS and change in agent welfare
-                betterSpiceSellerMRS = abs(1 - spiceSellerMRS) > abs(1 - spiceSellerNewMRS)
-                betterSugarSellerMRS = abs(1 - sugarSellerMRS) > abs(1 - sugarSellerNewMRS)
-                betterSpiceSellerWelfare = spiceSeller.findWelfare(sugarPrice, (-1 * spicePrice)) >= spiceSeller.findWelfare(0, 0)
-                betterSugarSellerWelfare = sugarSeller.findWelfare((-1 * sugarPrice), spicePrice) >= sugarSeller.findWelfare(0, 0)
-                # If either MRS or welfare is improved, mark the trade as better for agent
-                betterForSpiceSeller = betterSpiceSellerMRS or betterSpiceSellerWelfare
-                betterForSugarSeller = betterSugarSellerMRS or betterSugarSellerWelfare
-
-                # Check that spice seller's new MRS does not cross over sugar seller's new MRS
-                # Evaluates to False for successful trades
-                checkForMRSCrossing = spiceSellerNewMRS < sugarSellerNewMRS
-                if betterForSpiceSeller == True and betterForSugarSeller == True and checkForMRSCrossing == False:
-                    if "all" in self.debug or "agent" in self.debug:
-                        print(f"Agent {self.ID} trading [{sugarPrice}, {spicePrice}]")
-                    spiceSeller.sugar += sugarPrice
-                    spiceSeller.spice -= spicePrice
-                    sugarSeller.sugar -= sugarPrice
-                    sugarSeller.spice += spicePrice
-                    spiceSeller.findMarginalRateOfSubstitution()
-                    sugarSeller.findMarginalRateOfSubstitution()
-                    transactions += 1
-                else:
-                    tradeFlag = False
-                    continue
+            if self.tradeBisection == True:
+                spiceSeller, sugarSeller, sugarPrice, spicePrice, transactions = self.doTransactionsByBisection(trader)
+            else:
+                spiceSeller, sugarSeller, sugarPrice, spicePrice, transactions = self.doTransactions(trader)
             # If a trade occurred, log it
             if spiceSeller != None and sugarSeller != None:
                 self.tradeVolume += 1
@@ -649,6 +646,182 @@ class Agent:
                 elif sugarscape.experimentalGroup != None and trader.isInGroup(sugarscape.experimentalGroup, True):
                     self.tradeWithControlGroup += 1
 
+    def doTransactions(self, trader):
+        spiceSeller = None
+        sugarSeller = None
+        sugarPrice = 0
+        spicePrice = 0
+        tradeFlag = True
+        transactions = 0
+
+        # Each transaction is priced from the MRS values the previous one changed, so transactions run one at a time
+        while tradeFlag == True:
+            traderMRS = trader.marginalRateOfSubstitution
+            # If both trying to sell the same commodity, stop trading
+            if self.canTradeWithNeighbor(trader) == False:
+                tradeFlag = False
+                continue
+
+            # MRS > 1 indicates the agent has less need of spice and should become the spice seller
+            if traderMRS > self.marginalRateOfSubstitution:
+                spiceSeller = trader
+                sugarSeller = self
+            else:
+                spiceSeller = self
+                sugarSeller = trader
+            spiceSellerMRS = spiceSeller.marginalRateOfSubstitution
+            sugarSellerMRS = sugarSeller.marginalRateOfSubstitution
+
+            if spiceSellerMRS < 0 or sugarSellerMRS < 0:
+                spiceSeller = None
+                sugarSeller = None
+                break
+
+            # Find geometric mean of spice and sugar seller MRS for trade price
+            tradePrice = math.sqrt(spiceSellerMRS * sugarSellerMRS)
+            sugarPrice = 0
+            spicePrice = 0
+            # Set proper highest value commodity based on trade price
+            if tradePrice < 1:
+                spicePrice = 1
+                sugarPrice = tradePrice
+            else:
+                spicePrice = tradePrice
+                sugarPrice = 1
+
+            # If trade would be lethal, skip it
+            if spiceSeller.spice - spicePrice < spiceSeller.spiceMetabolism or sugarSeller.sugar - sugarPrice < sugarSeller.sugarMetabolism:
+                tradeFlag = False
+                continue
+            spiceSellerNewMRS = spiceSeller.findNewMarginalRateOfSubstitution(spiceSeller.sugar + sugarPrice, spiceSeller.spice - spicePrice)
+            sugarSellerNewMRS = sugarSeller.findNewMarginalRateOfSubstitution(sugarSeller.sugar - sugarPrice, sugarSeller.spice + spicePrice)
+
+            # Check that spice seller's new MRS does not cross over sugar seller's new MRS
+            # Evaluates to False for successful trades
+            checkForMRSCrossing = spiceSellerNewMRS < sugarSellerNewMRS
+            if checkForMRSCrossing == True:
+                tradeFlag = False
+                continue
+
+            # Calculate absolute difference from perfect spice/sugar parity in MRS and change in agent welfare
+            # Welfare is only evaluated when the trade does not already move the agent's MRS toward parity
+            betterForSpiceSeller = abs(1 - spiceSellerMRS) > abs(1 - spiceSellerNewMRS) or spiceSeller.isTradeWelfareImproving(sugarPrice, (-1 * spicePrice))
+            betterForSugarSeller = abs(1 - sugarSellerMRS) > abs(1 - sugarSellerNewMRS) or sugarSeller.isTradeWelfareImproving((-1 * sugarPrice), spicePrice)
+            if betterForSpiceSeller == True and betterForSugarSeller == True:
+                if "all" in self.debug or "agent" in self.debug:
+                    print(f"Agent {self.ID} trading [{sugarPrice}, {spicePrice}]")
+                spiceSeller.sugar += sugarPrice
+                spiceSeller.spice -= spicePrice
+                sugarSeller.sugar -= sugarPrice
+                sugarSeller.spice += spicePrice
+                spiceSeller.findMarginalRateOfSubstitution()
+                sugarSeller.findMarginalRateOfSubstitution()
+                transactions += 1
+            else:
+                tradeFlag = False
+                continue
+        return spiceSeller, sugarSeller, sugarPrice, spicePrice, transactions
+
+    def doTransactionsByBisection(self, trader):
+        states = [self.findTradeState(trader)]
+        records = []
+        finalTransactions = None
+        finalTransaction = None
+        lowerTransactions = 0
+        upperTransactions = None
+        stride = 1
+        # Gallop over the number of transactions for a bound on the first one that does not leave both agents better off
+        while upperTransactions == None:
+            probe = lowerTransactions + stride - 1
+            # Price transactions forward only as far as the probe, with only the checks needed to price the next one
+            while finalTransactions == None and len(records) <= probe:
+                finalTransaction = self.doUncheckedTransaction(trader, states, records)
+                if finalTransaction != "transaction":
+                    finalTransactions = len(states) - 1
+            if finalTransactions != None and probe >= finalTransactions:
+                upperTransactions = finalTransactions
+            elif self.isTransactionImproving(trader, states[probe], records[probe]) == True:
+                lowerTransactions = probe + 1
+                stride *= 2
+            else:
+                upperTransactions = probe
+        # Bisect within the bound, where every transaction has been priced
+        while lowerTransactions < upperTransactions:
+            probe = (lowerTransactions + upperTransactions) // 2
+            if self.isTransactionImproving(trader, states[probe], records[probe]) == True:
+                lowerTransactions = probe + 1
+            else:
+                upperTransactions = probe
+        transactions = lowerTransactions
+        self.setTradeState(trader, states[transactions])
+
+        # Replay the accepted transactions, then report the last priced transaction as the per-transaction loop does
+        if "all" in self.debug or "agent" in self.debug:
+            for record in records[:transactions]:
+                print(f"Agent {self.ID} trading [{record['sugarPrice']}, {record['spicePrice']}]")
+        if finalTransaction == "negative" and transactions == finalTransactions:
+            return None, None, 0, 0, transactions
+        if transactions < len(records):
+            record = records[transactions]
+        elif transactions > 0:
+            record = records[transactions - 1]
+        else:
+            return None, None, 0, 0, transactions
+        return record["spiceSeller"], record["sugarSeller"], record["sugarPrice"], record["spicePrice"], transactions
+
+    def doUncheckedTransaction(self, trader, states, records):
+        # Welfare checks are left to the bisection, so trading only stops here when the next transaction cannot be priced or made
+        self.setTradeState(trader, states[-1])
+        # Make the last priced transaction only once the bisection needs the transaction after it
+        if len(records) == len(states):
+            record = records[-1]
+            record["spiceSeller"].sugar += record["sugarPrice"]
+            record["spiceSeller"].spice -= record["spicePrice"]
+            record["sugarSeller"].sugar -= record["sugarPrice"]
+            record["sugarSeller"].spice += record["spicePrice"]
+            record["spiceSeller"].findMarginalRateOfSubstitution()
+            record["sugarSeller"].findMarginalRateOfSubstitution()
+            states.append(self.findTradeState(trader))
+        # If both trying to sell the same commodity, stop trading
+        if self.canTradeWithNeighbor(trader) == False:
+            return "stop"
+
+        # MRS > 1 indicates the agent has less need of spice and should become the spice seller
+        if trader.marginalRateOfSubstitution > self.marginalRateOfSubstitution:
+            spiceSeller = trader
+            sugarSeller = self
+        else:
+            spiceSeller = self
+            sugarSeller = trader
+        spiceSellerMRS = spiceSeller.marginalRateOfSubstitution
+        sugarSellerMRS = sugarSeller.marginalRateOfSubstitution
+        if spiceSellerMRS < 0 or sugarSellerMRS < 0:
+            return "negative"
+
+        # Find geometric mean of spice and sugar seller MRS for trade price
+        tradePrice = math.sqrt(spiceSellerMRS * sugarSellerMRS)
+        sugarPrice = 0
+        spicePrice = 0
+        # Set proper highest value commodity based on trade price
+        if tradePrice < 1:
+            spicePrice = 1
+            sugarPrice = tradePrice
+        else:
+            spicePrice = tradePrice
+            sugarPrice = 1
+        record = {"spiceSeller": spiceSeller, "sugarSeller": sugarSeller, "sugarPrice": sugarPrice, "spicePrice": spicePrice,
+                  "spiceSellerMRS": spiceSellerMRS, "sugarSellerMRS": sugarSellerMRS, "spiceSellerNewMRS": None, "sugarSellerNewMRS": None}
+        records.append(record)
+        # If trade would be lethal, stop trading
+        if spiceSeller.spice - spicePrice < spiceSeller.spiceMetabolism or sugarSeller.sugar - sugarPrice < sugarSeller.sugarMetabolism:
+            return "stop"
+        record["spiceSellerNewMRS"] = spiceSeller.findNewMarginalRateOfSubstitution(spiceSeller.sugar + sugarPrice, spiceSeller.spice - spicePrice)
+        record["sugarSellerNewMRS"] = sugarSeller.findNewMarginalRateOfSubstitution(sugarSeller.sugar - sugarPrice, sugarSeller.spice + spicePrice)
+        # Stop once spice seller's new MRS would cross over sugar seller's new MRS
+        if record["spiceSellerNewMRS"] < record["sugarSellerNewMRS"]:
+            return "stop"
+        return "transaction"
+
     def doUniversalIncome(self):
         if (self.timestep - self.lastUniversalSpiceIncomeTimestep) >= self.cell.environment.universalSpiceIncomeInterval:
             self.spice += self.universalSpice
@@ -666,7 +839,12 @@ class Agent:
             return leader.findBestCellForAgent(self)
 
         bestCell = None
-        potentialCells = self.rankCellsInRange()
+        # Greedy agents only act on the top ranked cell, so the full ranking is only built when debugging prints it
+        greedy = self.decisionModelFactor <= 0 or self.decisionModel == "none"
+        if greedy == True and "all" not in self.debug and "agent" not in self.debug:
+            potentialCells = self.rankCellsInRange(True)
+        else:
+            potentialCells = self.rankCellsInRange()
         greedyBestCell = potentialCells[0]["cell"]
 
         if self.decisionModelFactor > 0:
@@ -690,8 +868,9 @@ class Agent:
         if self.decisionModel == "none":
             return greedyBestCell
 
-        for cell in cells:
-            cell["wealth"] = self.findEthicalValueOfCell(cell["cell"])
+        ethicalValues = self.findEthicalValuesOfCells(cells)
+        for position in range(len(cells)):
+            cells[position]["wealth"] = ethicalValues[position]
         if self.selfishnessFactor >= 0:
             for cell in cells:
                 if cell["wealth"] > 0:
@@ -704,10 +883,10 @@ class Agent:
 
         # If additional ordering consideration, select new best cell
         if "Top" in self.decisionModel:
-            cells = self.sortCellsByWealth(cells)
             if "all" in self.debug or "agent" in self.debug:
+                cells = self.sortCellsByWealth(cells)
                 self.printEthicalCellScores(cells)
-            bestCell = cells[0]["cell"]
+            bestCell = next(self.findCellsByWealth(cells))["cell"]
 
         if bestCell == None:
             if greedyBestCell == None:
@@ -730,19 +909,32 @@ class Agent:
                 minHammingDistance = friend["hammingDistance"]
         return bestFriend
 
-    def findCellsInRange(self, newCell=None):
-        cell = self.cell if newCell == None else newCell
+    def findCellRange(self):
         vision = self.findVision()
         movement = self.findMovement()
-        cellRange = min(min(vision, movement), self.cell.environment.maxCellDistance)
+        return min(min(vision, movement), self.cell.environment.maxCellDistance)
+
+    def findCellsByWealth(self, cells):
+        # Lazily yield cells in the same order as sortCellsByWealth so callers needing only the first few skip a full sort
+        heap = [(-1 * cell["wealth"], cell["range"], position, cell) for position, cell in enumerate(cells)]
+        heapq.heapify(heap)
+        while len(heap) > 0:
+            yield heapq.heappop(heap)[3]
+
+    def findCellsInRange(self, newCell=None):
+        cell = self.cell if newCell == None else newCell
+        cellRange = self.findCellRange()
         allCells = {}
         if cellRange <= 0:
+            self.cellRange = 0
             self.cellsInRange = allCells
+            self.rangeCell = cell
             return allCells
-        for i in range(1, cellRange + 1):
-            allCells.update(cell.ranges[i])
+        allCells = self.cell.environment.findCellsInRange(cell, cellRange)
         if newCell == None:
+            self.cellRange = cellRange
             self.cellsInRange = allCells
+            self.rangeCell = cell
         return allCells
 
     def findChildEndowment(self, mate):
@@ -783,7 +975,7 @@ class Agent:
         "selfishnessFactor" : [self.selfishnessFactor, mate.selfishnessFactor]
         }
         childEndowment = {"seed": self.seed, "follower": self.follower}
-        randomNumberReset = random.getstate()
+        randomNumberReset = self.random.getstate()
 
         # Map configuration to a random number via hash to make random number generation independent of iteration order
         if self.childEndowmentHashes == None:
@@ -798,16 +990,16 @@ class Agent:
                 self.childEndowmentHashes[config] = hashNum
 
         for endowment in parentEndowments:
-            random.seed(self.childEndowmentHashes[endowment] + self.timestep)
-            index = random.randrange(2)
+            self.random.seed(self.childEndowmentHashes[endowment] + self.timestep)
+            index = self.random.randrange(2)
             endowmentValue = parentEndowments[endowment][index]
             childEndowment[endowment] = endowmentValue
 
         pairedEndowmentIndex = -1
         for endowment in pairedEndowments:
             if pairedEndowmentIndex == -1:
-                random.seed(self.childEndowmentHashes[endowment] + self.timestep)
-                pairedEndowmentIndex = random.randrange(2)
+                self.random.seed(self.childEndowmentHashes[endowment] + self.timestep)
+                pairedEndowmentIndex = self.random.randrange(2)
             endowmentValue = pairedEndowments[endowment][pairedEndowmentIndex]
             childEndowment[endowment] = endowmentValue
 
@@ -819,7 +1011,7 @@ class Agent:
 
         hashed = hashlib.md5("tags".encode())
         hashNum = int(hashed.hexdigest(), 16)
-        random.seed(hashNum + self.timestep)
+        self.random.seed(hashNum + self.timestep)
         childTags = []
         childImmuneSystem = []
         mateTags = mate.tags
@@ -831,14 +1023,15 @@ class Agent:
                 if self.tags[i] == mateTags[i]:
                     childTags.append(self.tags[i])
                 else:
-                    childTags.append(mismatchBits[random.randrange(2)])
+                    childTags.append(mismatchBits[self.random.randrange(2)])
         childEndowment["tags"] = childTags
         childEndowment["tagPreferences"] = self.tagPreferences
         childEndowment["tagging"] = self.tagging
+        childEndowment["tradeBisection"] = self.tradeBisection
 
         # Current implementation randomly assigns depressed state at agent birth
         depressionPercentage = self.cell.environment.sugarscape.configuration["agentDepressionPercentage"]
-        depression = random.random()
+        depression = self.random.random()
         if depression <= depressionPercentage:
             childEndowment["depressionFactor"] = 1
         else:
@@ -846,7 +1039,7 @@ class Agent:
 
         hashed = hashlib.md5("immuneSystem".encode())
         hashNum = int(hashed.hexdigest(), 16)
-        random.seed(hashNum + self.timestep)
+        self.random.seed(hashNum + self.timestep)
         if self.startingImmuneSystem == None:
             childImmuneSystem = None
         else:
@@ -854,9 +1047,9 @@ class Agent:
                 if self.startingImmuneSystem[i] == mate.startingImmuneSystem[i]:
                     childImmuneSystem.append(self.startingImmuneSystem[i])
                 else:
-                    childImmuneSystem.append(mismatchBits[random.randrange(2)])
+                    childImmuneSystem.append(mismatchBits[self.random.randrange(2)])
         childEndowment["immuneSystem"] = childImmuneSystem
-        random.setstate(randomNumberReset)
+        self.random.setstate(randomNumberReset)
         return childEndowment
 
     def findConflictHappiness(self):
@@ -910,11 +1103,7 @@ class Agent:
     def findHammingDistanceInTags(self, neighbor):
         if self.tags == None:
             return 0
-        neighborTags = neighbor.tags
-        hammingDistance = 0
-        for i in range(len(self.tags)):
-            if self.tags[i] != neighborTags[i]:
-                hammingDistance += 1
+        hammingDistance = bin(self.tagBits ^ neighbor.tagBits).count("1")
         return hammingDistance
 
     def findHappiness(self):
@@ -942,26 +1131,30 @@ class Agent:
             return 0
         diseaseTags = disease.tags
         diseaseLength = len(diseaseTags)
+        diseaseMask = (1 << diseaseLength) - 1
         bestHammingDistance = diseaseLength
         bestRange = [0, diseaseLength - 1]
         for i in range(len(self.immuneSystem) - diseaseLength):
-            hammingDistance = 0
-            for j in range(diseaseLength):
-                if self.immuneSystem[i + j] != diseaseTags[j]:
-                    hammingDistance += 1
+            # Hamming distance is the popcount of the immune system window XOR the disease tags
+            hammingDistance = bin(((self.immuneSystemBits >> i) & diseaseMask) ^ disease.tagBits).count("1")
             if hammingDistance < bestHammingDistance:
                 bestHammingDistance = hammingDistance
                 bestRange = [i, i + (diseaseLength - 1)]
+                # No later window can be strictly closer than an exact match
+                if bestHammingDistance == 0:
+                    break
         diseaseStats = {"distance": bestHammingDistance, "start": bestRange[0], "end": bestRange[1]}
         return diseaseStats
 
     def findNeighborhood(self, newCell=None):
         if newCell == None:
-            newNeighborhood = self.cellsInRange
+            occupiedCells = self.findOccupiedCellsInRange()
         else:
-            newNeighborhood = self.findCellsInRange(newCell)
+            occupiedCells = []
+            if len(self.findCellsInRange(newCell)) > 0:
+                occupiedCells = self.cell.environment.findOccupiedCellsInRange(newCell, self.findCellRange())
         neighborhood = []
-        for neighborCell in newNeighborhood.keys():
+        for neighborCell in occupiedCells:
             neighbor = neighborCell.agent
             if neighbor != None and neighbor.isAlive() == True:
                 neighborhood.append(neighbor)
@@ -970,6 +1163,10 @@ class Agent:
             self.neighborhood = neighborhood
         return neighborhood
 
+    def findNeighborhoodSize(self, newCell):
+        # Same count as len(self.findNeighborhood(newCell)), including this agent, without listing the neighbors
+        return self.cell.environment.findOccupiedCellCount(newCell, self.findCellRange()) + 1
+
     def findNewMarginalRateOfSubstitution(self, sugar, spice):
         spiceMetabolism = self.findSpiceMetabolism()
         sugarMetabolism = self.findSugarMetabolism()
@@ -985,9 +1182,14 @@ class Agent:
             return 1 / sugarMetabolism
         return spiceNeed / sugarNeed
 
+    def findOccupiedCellsInRange(self):
+        if len(self.cellsInRange) == 0:
+            return []
+        return self.cell.environment.findOccupiedCellsInRange(self.rangeCell, self.cellRange)
+
     def findRetaliatorsInVision(self):
         retaliators = {}
-        for cell in self.cellsInRange.keys():
+        for cell in self.findOccupiedCellsInRange():
             agent = cell.agent
             if agent != None:
                 agentWealth = agent.sugar + agent.spice
@@ -1029,13 +1231,15 @@ class Agent:
         self.timeToLive = timeToLive
         return timeToLive
 
+    def findTradeState(self, trader):
+        return (self.sugar, self.spice, self.marginalRateOfSubstitution, trader.sugar, trader.spice, trader.marginalRateOfSubstitution)
+
     def findTribe(self):
         if self.tags == None:
             return None
         config = self.cell.environment.sugarscape.configuration
         numTribes = config["environmentMaxTribes"]
         possibleZeroes = config["agentTagStringLength"] + 1
-        self.tagZeroes = self.tags.count(0)
         tribeSize = possibleZeroes / numTribes
         tribe = min(math.ceil((self.tagZeroes + 1) / tribeSize) - 1, numTribes - 1)
         return tribe
@@ -1050,25 +1254,32 @@ class Agent:
         return math.erf(diffWealth)
 
     def findWelfare(self, sugarReward, spiceReward):
-        spiceMetabolism = self.findSpiceMetabolism()
-        sugarMetabolism = self.findSugarMetabolism()
-        totalMetabolism = sugarMetabolism + spiceMetabolism
-        sugarMetabolismProportion = 0
-        spiceMetabolismProportion = 0
-        if totalMetabolism != 0:
-            sugarMetabolismProportion = sugarMetabolism / totalMetabolism
-            spiceMetabolismProportion = spiceMetabolism / totalMetabolism
-
-        sugarLookahead = sugarMetabolism * self.lookaheadFactor
-        spiceLookahead = spiceMetabolism * self.lookaheadFactor
+        sugarLookahead, spiceLookahead, sugarExponent, spiceExponent = self.findWelfarePreferences()
         totalSugar = (self.sugar + sugarReward) - sugarLookahead
         totalSpice = (self.spice + spiceReward) - spiceLookahead
         if totalSugar < 0:
             totalSugar = 0
         if totalSpice < 0:
             totalSpice = 0
+        welfare = (totalSugar ** sugarExponent) * (totalSpice ** spiceExponent)
+        return welfare
 
-        welfare = (totalSugar ** sugarMetabolismProportion) * (totalSpice ** spiceMetabolismProportion)
+    def findWelfarePreferences(self):
+        # Lookahead and exponents only change with metabolism, lookahead factor, or tags, so reuse them until one does
+        welfareKey = (self.sugarMetabolism, self.sugarMetabolismModifier, self.spiceMetabolism, self.spiceMetabolismModifier, self.lookaheadFactor, self.tags)
+        if self.welfarePreferences != None and self.welfareKey == welfareKey:
+            return self.welfarePreferences
+        spiceMetabolism = self.findSpiceMetabolism()
+        sugarMetabolism = self.findSugarMetabolism()
+        totalMetabolism = sugarMetabolism + spiceMetabolism
+        sugarExponent = 0
+        spiceExponent = 0
+        if totalMetabolism != 0:
+            sugarExponent = sugarMetabolism / totalMetabolism
+            spiceExponent = spiceMetabolism / totalMetabolism
+
+        sugarLookahead = sugarMetabolism * self.lookaheadFactor
+        spiceLookahead = spiceMetabolism * self.lookaheadFactor
         if self.tagPreferences == True and self.tags != None and len(self.tags) > 0:
             # Tribe could have changed since last timestep, so recheck
             self.tribe = self.findTribe()
@@ -1077,13 +1288,19 @@ class Agent:
             tagPreferences = (sugarMetabolism * fractionZeroesInTags) + (spiceMetabolism * fractionOnesInTags)
             if tagPreferences <= 0:
                 tagPreferences = 1
-            tagPreferencesSugar = (sugarMetabolism / tagPreferences) * fractionZeroesInTags
-            tagPreferencesSpice = (spiceMetabolism / tagPreferences) * fractionOnesInTags
-            welfare = (totalSugar ** tagPreferencesSugar) * (totalSpice ** tagPreferencesSpice)
-        return welfare
+            sugarExponent = (sugarMetabolism / tagPreferences) * fractionZeroesInTags
+            spiceExponent = (spiceMetabolism / tagPreferences) * fractionOnesInTags
+        self.welfareKey = welfareKey
+        self.welfarePreferences = (sugarLookahead, spiceLookahead, sugarExponent, spiceExponent)
+        return self.welfarePreferences
 
     def flipTag(self, position, value):
+        # Keep packed tags and zero count in step with the tag list
+        if self.tags[position] != value:
+            self.tagBits ^= 1 << position
+            self.tagZeroes += 1 if value == 0 else -1
         self.tags[position] = value
+        self.welfarePreferences = None
 
     def getDiseaseRecord(self, diseaseID):
         for currDisease in self.diseases:
@@ -1095,7 +1312,7 @@ class Agent:
     def gotoCell(self, cell):
         self.resetCell()
         self.cell = cell
-        self.cell.agent = self
+        self.cell.setAgent(self)
 
     def isAlive(self):
         if self.spice < 0 or self.sugar < 0:
@@ -1186,6 +1403,21 @@ class Agent:
             return True
         return False
 
+    def isTradeWelfareImproving(self, sugarReward, spiceReward):
+        return self.findWelfare(sugarReward, spiceReward) >= self.findWelfare(0, 0)
+
+    def isTransactionImproving(self, trader, state, record):
+        # Welfare is found from the holdings before the transaction, so both agents briefly take them on
+        self.setTradeState(trader, state)
+        spiceSeller = record["spiceSeller"]
+        sugarSeller = record["sugarSeller"]
+        sugarPrice = record["sugarPrice"]
+        spicePrice = record["spicePrice"]
+        # Calculate absolute difference from perfect spice/sugar parity in MRS and change in agent welfare
+        betterForSpiceSeller = abs(1 - record["spiceSellerMRS"]) > abs(1 - record["spiceSellerNewMRS"]) or spiceSeller.isTradeWelfareImproving(sugarPrice, (-1 * spicePrice))
+        betterForSugarSeller = abs(1 - record["sugarSellerMRS"]) > abs(1 - record["sugarSellerNewMRS"]) or sugarSeller.isTradeWelfareImproving((-1 * sugarPrice), spicePrice)
+        return betterForSpiceSeller == True and betterForSugarSeller == True
+
     def moveToBestCell(self):
         bestCell = self.findBestCell()
         if "all" in self.debug or "agent" in self.debug:
@@ -1262,12 +1494,87 @@ class Agent:
             print(f"Ethical cell {i + 1}/{len(cells)}: {cellString}")
             i += 1
 
-    def rankCellsInRange(self):
+    def rankCellsInRange(self, bestOnly=False):
+        # Welfare updates a stale tribe part way through ranking, which only the per-cell path reproduces
+        staleTribe = self.tagPreferences == True and self.tags != None and len(self.tags) > 0 and self.tribe != self.findTribe()
+        if self.cell.environment.arrayGrid == True and staleTribe == False:
+            return self.rankCellsInRangeArray(bestOnly)
+        return self.rankCellsInRangeObject(bestOnly)
+
+    def rankCellsInRangeArray(self, bestOnly=False):
+        self.findNeighborhood()
+        if len(self.cellsInRange) == 0:
+            return [{"cell": self.cell, "wealth": 0, "range": 0}]
+        environment = self.cell.environment
+        travelDistances, rangeIndices, rangeDistances = environment.findCellRangeArrays(self.rangeCell, self.cellRange)
+        numCells = len(travelDistances)
+        # Shuffle positions rather than cells to draw the same random numbers as the per-cell path
+        order = list(range(numCells))
+        self.random.shuffle(order)
+        order = numpy.array(order, dtype=numpy.int64)
+        shuffledPositions = numpy.empty(numCells, dtype=numpy.int64)
+        shuffledPositions[order] = numpy.arange(numCells)
+
+        retaliators = self.findRetaliatorsInVision()
+        combatMaxLoot = environment.maxCombatLoot
+        aggression = self.findAggression()
+
+        # Gather prey for occupied cells only, since most cells in range are empty
+        eligible = numpy.ones(numCells, dtype=bool)
+        hasPrey = numpy.zeros(numCells, dtype=bool)
+        preySugar = numpy.zeros(numCells, dtype=numpy.float64)
+        preySpice = numpy.zeros(numCells, dtype=numpy.float64)
+        preyRetaliation = numpy.zeros(numCells, dtype=numpy.float64)
+        rangePositions = environment.findCellRangePositions(self.rangeCell, self.cellRange)
+        for cell in self.findOccupiedCellsInRange():
+            prey = cell.agent
+            position = shuffledPositions[rangePositions[environment.findCellOffset(self.rangeCell, cell)]]
+            # Avoid attacking agents ineligible to attack
+            if self.isNeighborValidPrey(prey) == False:
+                eligible[position] = False
+                continue
+            hasPrey[position] = True
+            preySugar[position] = prey.sugar
+            preySpice[position] = prey.spice
+            preyRetaliation[position] = retaliators[prey.tribe]
+
+        shuffledIndices = rangeIndices[order]
+        pollutionDivisor = 1 + environment.cellPollution[shuffledIndices]
+        welfarePreySugar = aggression * numpy.minimum(combatMaxLoot, preySugar)
+        welfarePreySpice = aggression * numpy.minimum(combatMaxLoot, preySpice)
+        sugarRewards = (environment.cellSugar[shuffledIndices] + welfarePreySugar) / pollutionDivisor
+        spiceRewards = (environment.cellSpice[shuffledIndices] + welfarePreySpice) / pollutionDivisor
+
+        # Cells in range share few distinct rewards, so weigh each once with findWelfare to rank on the same welfare as the per-cell path
+        rewards = numpy.stack((sugarRewards, spiceRewards), axis=1)
+        uniqueRewards, rewardIndices = numpy.unique(rewards, axis=0, return_inverse=True)
+        rewardIndices = rewardIndices.reshape(-1)
+        rewardWelfare = [self.findWelfare(sugarReward, spiceReward) for sugarReward, spiceReward in uniqueRewards.tolist()]
+        welfare = numpy.array(rewardWelfare, dtype=numpy.float64)[rewardIndices]
+
+        # Avoid attacking agents protected via retaliation
+        retaliated = hasPrey & (preyRetaliation > (self.sugar + self.spice) + welfare)
+        potentialPositions = numpy.flatnonzero(eligible & ~retaliated)
+        if len(potentialPositions) == 0:
+            return [{"cell": self.cell, "wealth": 0, "range": 0}]
+        # Stable sort by wealth descending with range as a tiebreaker
+        potentialRanges = rangeDistances[order[potentialPositions]]
+        ranking = numpy.lexsort((potentialRanges, -1 * welfare[potentialPositions]))
+        if bestOnly == True:
+            ranking = ranking[:1]
+        rankedPositions = order[potentialPositions[ranking]]
+        rankedCells = []
+        for rangePosition, cellIndex, rewardIndex in zip(rankedPositions.tolist(), rangeIndices[rankedPositions].tolist(), rewardIndices[potentialPositions[ranking]].tolist()):
+            cellRecord = {"cell": environment.findCellAtIndex(cellIndex), "wealth": rewardWelfare[rewardIndex], "range": travelDistances[rangePosition]}
+            rankedCells.append(cellRecord)
+        return rankedCells
+
+    def rankCellsInRangeObject(self, bestOnly=False):
         self.findNeighborhood()
         if len(self.cellsInRange) == 0:
             return [{"cell": self.cell, "wealth": 0, "range": 0}]
         cellsInRange = list(self.cellsInRange.items())
-        random.shuffle(cellsInRange)
+        self.random.shuffle(cellsInRange)
 
         retaliators = self.findRetaliatorsInVision()
         combatMaxLoot = self.cell.environment.maxCombatLoot
@@ -1297,15 +1604,19 @@ class Agent:
             if prey != None and retaliators[preyTribe] > self.sugar + self.spice + welfare:
                 continue
 
-            # Select closest cell with the most resources
-            if welfare > bestWealth or (welfare == bestWealth and travelDistance < bestRange):
+            # Select closest cell with the most resources, keeping the earliest of any ties as the stable sort does
+            if bestCell == None or welfare > bestWealth or (welfare == bestWealth and travelDistance < bestRange):
                 bestCell = cell
                 bestWealth = welfare
                 bestRange = travelDistance
+            if bestOnly == True:
+                continue
 
             cellRecord = {"cell": cell, "wealth": welfare, "range": travelDistance}
             potentialCells.append(cellRecord)
 
+        if bestOnly == True and bestCell != None:
+            return [{"cell": bestCell, "wealth": bestWealth, "range": bestRange}]
         if len(potentialCells) == 0:
             potentialCells.append({"cell": self.cell, "wealth": 0, "range": 0})
         rankedCells = self.sortCellsByWealth(potentialCells)
@@ -1345,17 +1656,18 @@ class Agent:
         self.tradeWithControlGroup = 0
         self.tradeWithExperimentalGroup = 0
 
+    def setTags(self, tags):
+        self.tags = tags
+        self.tagBits = condition.findPackedBits(tags)
+        self.tagZeroes = tags.count(0) if tags != None else 0
+        self.welfarePreferences = None
+
+    def setTradeState(self, trader, state):
+        self.sugar, self.spice, self.marginalRateOfSubstitution, trader.sugar, trader.spice, trader.marginalRateOfSubstitution = state
+
     def sortCellsByWealth(self, cells):
-        # Insertion sort of cells by wealth in descending order with range as a tiebreaker
-        i = 0
-        while i < len(cells):
-            j = i
-            while j > 0 and (cells[j - 1]["wealth"] < cells[j]["wealth"] or (cells[j - 1]["wealth"] == cells[j]["wealth"] and cells[j - 1]["range"] > cells[j]["range"])):
-                currCell = cells[j]
-                cells[j] = cells[j - 1]
-                cells[j - 1] = currCell
-                j -= 1
-            i += 1
+        # Stable sort of cells by wealth in descending order with range as a tiebreaker
+        cells.sort(key=lambda cell: (-1 * cell["wealth"], cell["range"]))
         return cells
 
     def spawnChild(self, childID, birthday, cell, configuration):
@@ -1466,3 +1778,152 @@ class Agent:
 
     def __str__(self):
         return f"{self.ID}"
+
+class ArrayAgent(Agent):
+    # Numeric fields live in the agent store so income, metabolism and aging can be done for every stored agent at once
+    __slots__ = ()
+
+    def doAging(self):
+        # Stored agents age together in AgentStore.doAging once every agent has acted
+        return
+
+    def doMetabolism(self):
+        # Stored agents metabolize together in AgentStore.doMetabolism once every agent has acted
+        return
+
+    def doUniversalIncome(self):
+        # Stored agents receive universal income together in AgentStore.doUniversalIncome once every agent has acted
+        return
+
+    def updateMeanIncome(self, sugarIncome, spiceIncome):
+        # Income is gathered over the timestep and averaged in AgentStore.updateMeanIncome
+        self.agentStore.sugarIncome[self.storeIndex] += sugarIncome
+        self.agentStore.spiceIncome[self.storeIndex] += spiceIncome
+
+    @property
+    def age(self):
+        return self.agentStore.age[self.storeIndex]
+
+    @age.setter
+    def age(self, value):
+        self.agentStore.age[self.storeIndex] = value
+
+    @property
+    def alive(self):
+        return self.agentStore.alive[self.storeIndex]
+
+    @alive.setter
+    def alive(self, value):
+        self.agentStore.alive[self.storeIndex] = value
+
+    @property
+    def lastUniversalSpiceIncomeTimestep(self):
+        return self.agentStore.lastUniversalSpiceIncomeTimestep[self.storeIndex]
+
+    @lastUniversalSpiceIncomeTimestep.setter
+    def lastUniversalSpiceIncomeTimestep(self, value):
+        self.agentStore.lastUniversalSpiceIncomeTimestep[self.storeIndex] = value
+
+    @property
+    def lastUniversalSugarIncomeTimestep(self):
+        return self.agentStore.lastUniversalSugarIncomeTimestep[self.storeIndex]
+
+    @lastUniversalSugarIncomeTimestep.setter
+    def lastUniversalSugarIncomeTimestep(self, value):
+        self.agentStore.lastUniversalSugarIncomeTimestep[self.storeIndex] = value
+
+    @property
+    def maxAge(self):
+        return self.agentStore.maxAge[self.storeIndex]
+
+    @maxAge.setter
+    def maxAge(self, value):
+        self.agentStore.maxAge[self.storeIndex] = value
+
+    @property
+    def spice(self):
+        return self.agentStore.spice[self.storeIndex]
+
+    @spice.setter
+    def spice(self, value):
+        self.agentStore.spice[self.storeIndex] = value
+
+    @property
+    def spiceMeanIncome(self):
+        return self.agentStore.spiceMeanIncome[self.storeIndex]
+
+    @spiceMeanIncome.setter
+    def spiceMeanIncome(self, value):
+        self.agentStore.spiceMeanIncome[self.storeIndex] = value
+
+    @property
+    def spiceMetabolism(self):
+        return self.agentStore.spiceMetabolism[self.storeIndex]
+
+    @spiceMetabolism.setter
+    def spiceMetabolism(self, value):
+        self.agentStore.spiceMetabolism[self.storeIndex] = value
+
+    @property
+    def spiceMetabolismModifier(self):
+        return self.agentStore.spiceMetabolismModifier[self.storeIndex]
+
+    @spiceMetabolismModifier.setter
+    def spiceMetabolismModifier(self, value):
+        self.agentStore.spiceMetabolismModifier[self.storeIndex] = value
+
+    @property
+    def sugar(self):
+        return self.agentStore.sugar[self.storeIndex]
+
+    @sugar.setter
+    def sugar(self, value):
+        self.agentStore.sugar[self.storeIndex] = value
+
+    @property
+    def sugarMeanIncome(self):
+        return self.agentStore.sugarMeanIncome[self.storeIndex]
+
+    @sugarMeanIncome.setter
+    def sugarMeanIncome(self, value):
+        self.agentStore.sugarMeanIncome[self.storeIndex] = value
+
+    @property
+    def sugarMetabolism(self):
+        return self.agentStore.sugarMetabolism[self.storeIndex]
+
+    @sugarMetabolism.setter
+    def sugarMetabolism(self, value):
+        self.agentStore.sugarMetabolism[self.storeIndex] = value
+
+    @property
+    def sugarMetabolismModifier(self):
+        return self.agentStore.sugarMetabolismModifier[self.storeIndex]
+
+    @sugarMetabolismModifier.setter
+    def sugarMetabolismModifier(self, value):
+        self.agentStore.sugarMetabolismModifier[self.storeIndex] = value
+
+    @property
+    def timeToLive(self):
+        return self.agentStore.timeToLive[self.storeIndex]
+
+    @timeToLive.setter
+    def timeToLive(self, value):
+        self.agentStore.timeToLive[self.storeIndex] = value
+
+    @property
+    def universalSpice(self):
+        return self.agentStore.universalSpice[self.storeIndex]
+
+    @universalSpice.setter
+    def universalSpice(self, value):
+        self.agentStore.universalSpice[self.storeIndex] = value
+
+    @property
+    def universalSugar(self):
+        return self.agentStore.universalSugar[self.storeIndex]
+
+    @universalSugar.setter
+    def universalSugar(self, value):
+        self.agentStore.universalSugar[self.storeIndex] = value
@@ -0,0 +1,165 @@
+import agent
+import ethics
+
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Decision models with array-backed views, so the leader keeps its own attributes and runs its phases in its timestep
+arrayClasses = {agent.Agent: agent.ArrayAgent, ethics.Bentham: ethics.ArrayBentham, ethics.ReactiveBentham: ethics.ArrayReactiveBentham}
+
+class AgentStore:
+    # Object arrays keep the integers and floats agents would hold, so batched phases do the same arithmetic as agents do one at a time
+    fields = ("age", "alive", "lastUniversalSpiceIncomeTimestep", "lastUniversalSugarIncomeTimestep", "maxAge", "spice", "spiceIncome",
+              "spiceMeanIncome", "spiceMetabolism", "spiceMetabolismModifier", "sugar", "sugarIncome", "sugarMeanIncome", "sugarMetabolism",
+              "sugarMetabolismModifier", "timeToLive", "universalSpice", "universalSugar")
+
+    def __init__(self, environment, capacity=64):
+        self.environment = environment
+        self.size = 0
+        for field in self.fields:
+            setattr(self, field, numpy.zeros(capacity, dtype=object))
+
+    def addAgent(self, a):
+        arrayClass = self.findArrayClass(type(a))
+        if arrayClass == None:
+            return
+        if self.size == len(self.age):
+            self.grow()
+        values = {field: getattr(a, field) for field in self.fields if field not in ("spiceIncome", "sugarIncome")}
+        # Plain slots are emptied so values only live in the store
+        for field in values:
+            delattr(a, field)
+        a.agentStore = self
+        a.storeIndex = self.size
+        self.size += 1
+        a.__class__ = arrayClass
+        for field, value in values.items():
+            setattr(a, field, value)
+        self.spiceIncome[a.storeIndex] = 0
+        self.sugarIncome[a.storeIndex] = 0
+
+    def doAging(self, agents, indices):
+        self.age[indices] += 1
+        maxAge = self.maxAge[indices]
+        # Die if reached max age and if not infinitely-lived
+        agedAgents = (self.age[indices] >= maxAge) & (maxAge != -1)
+        for a in self.findAgents(agents, agedAgents):
+            a.doDeath("aging")
+        return self.findAgents(agents, agedAgents == False), indices[agedAgents == False]
+
+    def doMetabolism(self, agents, indices):
+        spiceMetabolism = self.findMetabolism(self.spiceMetabolism[indices], self.spiceMetabolismModifier[indices])
+        sugarMetabolism = self.findMetabolism(self.sugarMetabolism[indices], self.sugarMetabolismModifier[indices])
+        self.sugar[indices] -= sugarMetabolism
+        self.spice[indices] -= spiceMetabolism
+        if self.environment.pollutionStart <= self.environment.timestep <= self.environment.pollutionEnd:
+            for a, agentSugarMetabolism, agentSpiceMetabolism in zip(agents, sugarMetabolism, spiceMetabolism):
+                a.cell.doSugarConsumptionPollution(agentSugarMetabolism)
+                a.cell.doSpiceConsumptionPollution(agentSpiceMetabolism)
+        sugar = self.sugar[indices]
+        spice = self.spice[indices]
+        starvedAgents = (sugar < 0) | (spice < 0) | ((sugar <= 0) & (sugarMetabolism > 0)) | ((spice <= 0) & (spiceMetabolism > 0))
+        for a in self.findAgents(agents, starvedAgents):
+            a.doDeath("starvation")
+        return self.findAgents(agents, starvedAgents == False), indices[starvedAgents == False]
+
+    def doTimestep(self, agents, timestep, timer=None):
+        storedAgents = [a for a in agents if a.agentStore == self]
+        indices = numpy.array([a.storeIndex for a in storedAgents], dtype=numpy.int64)
+        livingAgents = self.isAlive(indices)
+        storedAgents = self.findAgents(storedAgents, livingAgents)
+        indices = indices[livingAgents]
+        self.updateMeanIncome(indices)
+        self.doUniversalIncome(indices, timestep)
+        if timer != None:
+            timer.lap("agentCollection")
+        storedAgents, indices = self.doMetabolism(storedAgents, indices)
+        if timer != None:
+            timer.lap("agentMetabolism")
+        self.doAging(storedAgents, indices)
+        if timer != None:
+            timer.lap("agentAging")
+
+    def doUniversalIncome(self, indices, timestep):
+        spiceIndices = indices[(timestep - self.lastUniversalSpiceIncomeTimestep[indices]) >= self.environment.universalSpiceIncomeInterval]
+        self.spice[spiceIndices] += self.universalSpice[spiceIndices]
+        self.lastUniversalSpiceIncomeTimestep[spiceIndices] = timestep
+        sugarIndices = indices[(timestep - self.lastUniversalSugarIncomeTimestep[indices]) >= self.environment.universalSugarIncomeInterval]
+        self.sugar[sugarIndices] += self.universalSugar[sugarIndices]
+        self.lastUniversalSugarIncomeTimestep[sugarIndices] = timestep
+
+    def findAgents(self, agents, selectedAgents):
+        return [agents[i] for i in numpy.flatnonzero(selectedAgents).tolist()]
+
+    def findAgentTimesToLive(self, agents):
+        # Agents outside the store find their own times to live
+        agentTimesToLive = [None for a in agents]
+        storedAgents = [i for i in range(len(agents)) if agents[i].agentStore == self]
+        timesToLive, ageLimitedTimesToLive = self.findTimesToLive(numpy.array([agents[i].storeIndex for i in storedAgents], dtype=numpy.int64))
+        for i, timeToLive, ageLimitedTimeToLive in zip(storedAgents, timesToLive, ageLimitedTimesToLive):
+            agentTimesToLive[i] = (timeToLive, ageLimitedTimeToLive)
+        for i in range(len(agents)):
+            if agentTimesToLive[i] == None:
+                agentTimesToLive[i] = (agents[i].findTimeToLive(), agents[i].findTimeToLive(True))
+        return agentTimesToLive
+
+    def findArrayClass(self, agentClass):
+        return arrayClasses.get(agentClass)
+
+    def findMetabolism(self, metabolism, metabolismModifier):
+        metabolism = metabolism + metabolismModifier
+        return numpy.where(metabolism > 0, metabolism, 0)
+
+    def findResourceTimeToLive(self, resource, metabolism):
+        # If no metabolism for the resource, set days to death for that resource to seemingly infinite
+        timeToLive = numpy.full(len(resource), sys.maxsize, dtype=object)
+        metabolizing = metabolism > 0
+        timeToLive[metabolizing] = resource[metabolizing] / metabolism[metabolizing]
+        return timeToLive
+
+    def findTimesToLive(self, indices):
+        spiceMetabolism = self.findMetabolism(self.spiceMetabolism[indices], self.spiceMetabolismModifier[indices])
+        sugarMetabolism = self.findMetabolism(self.sugarMetabolism[indices], self.sugarMetabolismModifier[indices])
+        spice = self.spice[indices]
+        sugar = self.sugar[indices]
+        spiceTimeToLive = self.findResourceTimeToLive(spice, spiceMetabolism)
+        sugarTimeToLive = self.findResourceTimeToLive(sugar, sugarMetabolism)
+        # If an agent has basic income, include the income for at least as many timesteps as they can already survive
+        universalSugar = self.universalSugar[indices]
+        incomeAgents = universalSugar != 0
+        if incomeAgents.any() == True:
+            sugarIncome = (sugarTimeToLive[incomeAgents] * universalSugar[incomeAgents]) / self.environment.universalSugarIncomeInterval
+            sugarTimeToLive[incomeAgents] = self.findResourceTimeToLive(sugar[incomeAgents] + sugarIncome, sugarMetabolism[incomeAgents])
+        universalSpice = self.universalSpice[indices]
+        incomeAgents = universalSpice != 0
+        if incomeAgents.any() == True:
+            spiceIncome = (spiceTimeToLive[incomeAgents] * universalSpice[incomeAgents]) / self.environment.universalSpiceIncomeInterval
+            spiceTimeToLive[incomeAgents] = self.findResourceTimeToLive(spice[incomeAgents] + spiceIncome, spiceMetabolism[incomeAgents])
+        # Keep the first of equal times to live, as min does
+        timesToLive = numpy.where(spiceTimeToLive < sugarTimeToLive, spiceTimeToLive, sugarTimeToLive)
+        ageLimits = self.maxAge[indices] - self.age[indices]
+        ageLimitedTimesToLive = numpy.where(ageLimits < timesToLive, ageLimits, timesToLive)
+        self.timeToLive[indices] = ageLimitedTimesToLive
+        return timesToLive, ageLimitedTimesToLive
+
+    def grow(self):
+        for field in self.fields:
+            values = getattr(self, field)
+            setattr(self, field, numpy.concatenate((values, numpy.zeros(len(values), dtype=object))))
+
+    def isAlive(self, indices):
+        livingAgents = (self.alive[indices] == True) & (self.spice[indices] >= 0) & (self.sugar[indices] >= 0)
+        self.alive[indices[livingAgents == False]] = False
+        return livingAgents
+
+    def updateMeanIncome(self, indices):
+        # Define weight for moving average
+        alpha = 0.05
+        self.sugarMeanIncome[indices] = (alpha * self.sugarIncome[indices]) + ((1 - alpha) * self.sugarMeanIncome[indices])
+        self.spiceMeanIncome[indices] = (alpha * self.spiceIncome[indices]) + ((1 - alpha) * self.spiceMeanIncome[indices])
+        self.sugarIncome[:self.size] = 0
+        self.spiceIncome[:self.size] = 0
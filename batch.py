@@ -0,0 +1,24 @@
+import sugarscape
+
+import sys
+import traceback
+
+# Each worker process keeps the geometry of the grids it has built so later simulations on the same grid reuse their neighbor indices and range offsets
+geometryCache = {}
+
+def runSimulation(options):
+    configuration = sugarscape.createConfiguration(options)
+    S = sugarscape.createSimulation(configuration, geometryCache)
+    exitCode = S.runSimulation(configuration["timesteps"])
+    sys.stdout.flush()
+    if exitCode != 0:
+        raise RuntimeError(f"Simulation finished with exit code {exitCode}.")
+    return S.runtimeStats
+
+def runSimulationSafely(options):
+    # Failed simulations are reported and skipped so the rest of the batch keeps running
+    try:
+        return runSimulation(options)
+    except Exception:
+        traceback.print_exc()
+        return None
@@ -0,0 +1,69 @@
+import gc
+import os
+import sys
+import tracemalloc
+
+# Simulation modules live in the parent directory unless another source tree is measured
+sourceTree = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, sourceTree)
+
+import commandline
+
+def findInstanceSize(instance):
+    size = sys.getsizeof(instance)
+    # Instances without a fixed attribute layout also carry a per-instance dictionary
+    if hasattr(instance, "__dict__"):
+        size += sys.getsizeof(instance.__dict__)
+    return size
+
+def findMemoryUsage(instanceClass):
+    instances = [instance for instance in gc.get_objects() if isinstance(instance, instanceClass)]
+    totalSize = 0
+    for instance in instances:
+        totalSize += findInstanceSize(instance)
+    meanSize = totalSize / len(instances) if len(instances) > 0 else 0
+    return {"instances": len(instances), "totalBytes": totalSize, "meanBytes": meanSize}
+
+def runSimulation(configuration):
+    S = sugarscape.Sugarscape(configuration)
+    # Step through doTimestep alone so earlier source trees are measured doing the same work
+    S.updateRuntimeStats()
+    for timestep in range(configuration["timesteps"]):
+        if len(S.agents) == 0:
+            break
+        S.doTimestep()
+    return S
+
+if __name__ == "__main__":
+    scriptOptions = (("s", "source", "source", "source tree", str, "Measure the simulation modules in the specified source tree, such as a checkout of an earlier commit."),
+                     ("t", "timesteps", "timesteps", "number of timesteps", int, "Run the specified number of timesteps before measuring."))
+    options = commandline.parseOptions("memory.py", scriptOptions, {"source": sourceTree, "timesteps": None})
+    # Simulation modules are imported only once the source tree is known
+    sys.path.insert(0, os.path.abspath(options["source"]))
+    import agent
+    import cell
+    import sugarscape
+    configuration = commandline.readConfiguration(options["config"])
+    if "agentDecisionModel" not in configuration:
+        configuration["agentDecisionModel"] = None
+    if options["timesteps"] != None:
+        configuration["timesteps"] = options["timesteps"]
+    # Enforce noninteractive, no-output mode
+    configuration["debugMode"] = ["none"]
+    configuration["headlessMode"] = True
+    configuration["logfile"] = None
+    configuration["profileMode"] = False
+    configuration = sugarscape.verifyConfiguration(configuration)
+
+    tracemalloc.start()
+    S = runSimulation(configuration)
+    currentMemory, peakMemory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.collect()
+    agentMemory = findMemoryUsage(agent.Agent)
+    cellMemory = findMemoryUsage(cell.Cell)
+    print(f"Timesteps: {S.timestep}\nLiving agents: {len(S.agents)}")
+    print(f"Agents retained: {agentMemory['instances']}\nBytes per agent: {agentMemory['meanBytes']:.1f}\nTotal agent bytes: {agentMemory['totalBytes']}")
+    print(f"Cells: {cellMemory['instances']}\nBytes per cell: {cellMemory['meanBytes']:.1f}\nTotal cell bytes: {cellMemory['totalBytes']}")
+    print(f"Traced memory: {currentMemory / 1048576:.2f} MiB\nPeak traced memory: {peakMemory / 1048576:.2f} MiB")
+    exit(0)
@@ -1,6 +1,10 @@
 import math
 
 class Cell:
+    # Fixed attribute layout avoids a per-cell dictionary across the grid
+    __slots__ = ("agent", "environment", "hemisphere", "maxSpice", "maxSugar", "neighbors", "pollution", "pollutionFlux", "rangeViews",
+                 "season", "spice", "spiceLastProduced", "sugar", "sugarLastProduced", "timestep", "x", "y")
+
     def __init__(self, x, y, environment, maxSugar=0, maxSpice=0, growbackRate=0):
         self.x = x
         self.y = y
@@ -13,7 +17,7 @@ class Cell:
         self.neighbors = {}
         self.pollution = 0
         self.pollutionFlux = 0
-        self.ranges = {}
+        self.rangeViews = {}
         self.season = None
         self.spice = maxSpice
         self.spiceLastProduced = 0
@@ -128,6 +132,7 @@ class Cell:
 
     def resetAgent(self):
         self.agent = None
+        self.environment.removeOccupiedCell(self)
 
     def resetSpice(self):
         self.spice = 0
@@ -135,6 +140,10 @@ class Cell:
     def resetSugar(self):
         self.sugar = 0
 
+    def setAgent(self, agent):
+        self.agent = agent
+        self.environment.addOccupiedCell(self)
+
     def updateSeason(self):
         if self.season == "wet":
             self.season = "dry"
@@ -148,3 +157,104 @@ class Cell:
         else:
             string = f"{str(self.sugar)}/{str(self.spice)}"
         return string
+
+class ArrayCell(Cell):
+    # Resource fields live in environment-wide arrays so growback can be done for the whole grid at once
+    __slots__ = ("index",)
+    seasons = (None, "wet", "dry")
+
+    def __init__(self, x, y, environment, maxSugar=0, maxSpice=0, growbackRate=0):
+        self.index = (x * environment.height) + y
+        super().__init__(x, y, environment, maxSugar, maxSpice, growbackRate)
+
+    def findResource(self, values, integers):
+        # Float resource arrays hand back integral values as integers wherever a plain cell would hold an integer
+        if len(integers) > 0 and integers.item(self.index) == True:
+            return int(values.item(self.index))
+        return values.item(self.index)
+
+    def setResource(self, values, integers, value):
+        values[self.index] = value
+        if len(integers) > 0:
+            integers[self.index] = type(value) == int
+
+    @property
+    def maxSpice(self):
+        return self.findResource(self.environment.cellMaxSpice, self.environment.cellMaxSpiceIntegers)
+
+    @maxSpice.setter
+    def maxSpice(self, value):
+        self.setResource(self.environment.cellMaxSpice, self.environment.cellMaxSpiceIntegers, value)
+
+    @property
+    def maxSugar(self):
+        return self.findResource(self.environment.cellMaxSugar, self.environment.cellMaxSugarIntegers)
+
+    @maxSugar.setter
+    def maxSugar(self, value):
+        self.setResource(self.environment.cellMaxSugar, self.environment.cellMaxSugarIntegers, value)
+
+    @property
+    def pollution(self):
+        return self.environment.cellPollution.item(self.index)
+
+    @pollution.setter
+    def pollution(self, value):
+        self.environment.cellPollution[self.index] = value
+
+    @property
+    def pollutionFlux(self):
+        return self.environment.cellPollutionFlux.item(self.index)
+
+    @pollutionFlux.setter
+    def pollutionFlux(self, value):
+        self.environment.cellPollutionFlux[self.index] = value
+
+    @property
+    def season(self):
+        return self.seasons[self.environment.cellSeasons.item(self.index)]
+
+    @season.setter
+    def season(self, value):
+        self.environment.cellSeasons[self.index] = self.seasons.index(value)
+
+    @property
+    def spice(self):
+        return self.findResource(self.environment.cellSpice, self.environment.cellSpiceIntegers)
+
+    @spice.setter
+    def spice(self, value):
+        self.setResource(self.environment.cellSpice, self.environment.cellSpiceIntegers, value)
+
+    @property
+    def spiceLastProduced(self):
+        return self.findResource(self.environment.cellSpiceLastProduced, self.environment.cellSpiceLastProducedIntegers)
+
+    @spiceLastProduced.setter
+    def spiceLastProduced(self, value):
+        self.setResource(self.environment.cellSpiceLastProduced, self.environment.cellSpiceLastProducedIntegers, value)
+
+    @property
+    def sugar(self):
+        return self.findResource(self.environment.cellSugar, self.environment.cellSugarIntegers)
+
+    @sugar.setter
+    def sugar(self, value):
+        self.setResource(self.environment.cellSugar, self.environment.cellSugarIntegers, value)
+
+    @property
+    def sugarLastProduced(self):
+        return self.findResource(self.environment.cellSugarLastProduced, self.environment.cellSugarLastProducedIntegers)
+
+    @sugarLastProduced.setter
+    def sugarLastProduced(self, value):
+        self.setResource(self.environment.cellSugarLastProduced, self.environment.cellSugarLastProducedIntegers, value)
+
+    @property
+    def timestep(self):
+        return self.environment.timestep
+
+    @timestep.setter
+    def timestep(self, value):
+        # Cell timestep always mirrors the environment timestep
+        return
@@ -0,0 +1,85 @@
+import agent
+import cell
+import condition
+import environment
+
+import copyreg
+import pickle
+import types
+
+# Simulation objects are written as empty shells first and filled in afterward, keeping pickling depth flat across long agent and cell chains
+checkpointClasses = (agent.Agent, cell.Cell, condition.Condition, environment.Environment)
+
+def createMappingProxy(mapping):
+    return types.MappingProxyType(mapping)
+
+class CheckpointPickler(pickle.Pickler):
+    def __init__(self, file, sugarscape):
+        super().__init__(file, pickle.HIGHEST_PROTOCOL)
+        self.dispatch_table = copyreg.dispatch_table.copy()
+        self.dispatch_table[types.MappingProxyType] = self.reduceMappingProxy
+        self.pendingObjects = []
+        self.sugarscape = sugarscape
+
+    def dumpObjects(self):
+        while len(self.pendingObjects) > 0:
+            objects = self.pendingObjects
+            self.pendingObjects = []
+            self.dump([(instance, self.findObjectState(instance)) for instance in objects])
+        self.dump(None)
+
+    def findObjectState(self, instance):
+        state = dict(instance.__dict__) if hasattr(instance, "__dict__") else {}
+        for instanceClass in type(instance).__mro__:
+            for attribute in instanceClass.__dict__.get("__slots__", ()):
+                # Read slots directly so subclass properties backed by arrays are not read through
+                try:
+                    state[attribute] = instanceClass.__dict__[attribute].__get__(instance, type(instance))
+                except AttributeError:
+                    continue
+        for attribute in getattr(type(instance), "checkpointCaches", ()):
+            state[attribute] = type(state[attribute])()
+        return state
+
+    def persistent_id(self, instance):
+        if instance is self.sugarscape:
+            return "sugarscape"
+        return None
+
+    def reduceMappingProxy(self, mappingProxy):
+        return (createMappingProxy, (dict(mappingProxy),))
+
+    def reducer_override(self, instance):
+        if isinstance(instance, checkpointClasses):
+            self.pendingObjects.append(instance)
+            return (copyreg.__newobj__, (type(instance),))
+        return NotImplemented
+
+class CheckpointUnpickler(pickle.Unpickler):
+    def __init__(self, file, sugarscape):
+        super().__init__(file)
+        self.sugarscape = sugarscape
+
+    def loadObjects(self):
+        objects = self.load()
+        while objects != None:
+            for instance, state in objects:
+                self.setObjectState(instance, state)
+            objects = self.load()
+
+    def persistent_load(self, persistentID):
+        if persistentID == "sugarscape":
+            return self.sugarscape
+        raise pickle.UnpicklingError(f"Unrecognized checkpoint object {persistentID}")
+
+    def setObjectState(self, instance, state):
+        for attribute, value in state.items():
+            slot = None
+            for instanceClass in type(instance).__mro__:
+                if attribute in instanceClass.__dict__.get("__slots__", ()):
+                    slot = instanceClass.__dict__[attribute]
+                    break
+            if slot != None:
+                slot.__set__(instance, value)
+            else:
+                instance.__dict__[attribute] = value
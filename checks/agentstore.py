@@ -0,0 +1,101 @@
+import os
+import sys
+
+# Simulation modules live in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import agent
+import agentstore
+import commandline
+import sugarscape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+storePhases = ("updateMeanIncome", "doUniversalIncome", "doMetabolism", "doAging", "findTimesToLive")
+
+def findAgentStates(agents):
+    # Integers and floats are told apart so batched arithmetic has to keep the types agents would hold
+    fields = [field for field in agentstore.AgentStore.fields if field not in ("spiceIncome", "sugarIncome")]
+    return [(a.ID, a.causeOfDeath) + tuple((type(getattr(a, field)), getattr(a, field)) for field in fields) for a in agents]
+
+def findStoredAgents(S):
+    storedAgents = [a for a in S.agents if a.agentStore == S.agentStore]
+    return storedAgents, [a for a in storedAgents if a.isAlive() == True]
+
+def checkStorePhase(batchS, agentS, phase):
+    batchAgents, batchLivingAgents = findStoredAgents(batchS)
+    agentAgents, agentLivingAgents = findStoredAgents(agentS)
+    indices = numpy.array([a.storeIndex for a in batchLivingAgents], dtype=numpy.int64)
+    timestep = batchS.timestep + 1
+    if phase == "updateMeanIncome":
+        # Income from the cells agents stand on, which holds integers or floats depending on the regrowth rates
+        for a in batchLivingAgents:
+            batchS.agentStore.sugarIncome[a.storeIndex] = a.cell.sugar
+            batchS.agentStore.spiceIncome[a.storeIndex] = a.cell.spice
+        batchS.agentStore.updateMeanIncome(indices)
+        for a in agentLivingAgents:
+            agent.Agent.updateMeanIncome(a, a.cell.sugar, a.cell.spice)
+    elif phase == "doUniversalIncome":
+        batchS.agentStore.doUniversalIncome(indices, timestep)
+        for a in agentLivingAgents:
+            a.timestep = timestep
+            agent.Agent.doUniversalIncome(a)
+    elif phase == "doMetabolism":
+        batchS.agentStore.doMetabolism(batchLivingAgents, indices)
+        for a in agentLivingAgents:
+            agent.Agent.doMetabolism(a)
+    elif phase == "doAging":
+        batchS.agentStore.doAging(batchLivingAgents, indices)
+        for a in agentLivingAgents:
+            agent.Agent.doAging(a)
+    elif phase == "findTimesToLive":
+        batchTimesToLive = batchS.agentStore.findAgentTimesToLive(batchLivingAgents)
+        agentTimesToLive = [(a.findTimeToLive(), a.findTimeToLive(True)) for a in agentLivingAgents]
+        if [(type(t), t, type(u), u) for t, u in batchTimesToLive] != [(type(t), t, type(u), u) for t, u in agentTimesToLive]:
+            return False
+    return findAgentStates(batchAgents) == findAgentStates(agentAgents)
+
+if __name__ == "__main__":
+    scriptOptions = (("s", "seeds", "seeds", "number of seeds", int, "Compare batched and per-agent phases over the specified number of seeds."),
+                     ("t", "timesteps", "timesteps", "number of timesteps", int, "Check phases after each of the specified number of timesteps."))
+    options = commandline.parseOptions("agentstore.py", scriptOptions, {"seeds": 2, "timesteps": 20})
+    configuration = commandline.readConfiguration(options["config"])
+    if numpy == None:
+        print("NumPy is required to store agents in arrays.")
+        exit(1)
+    totalMismatches = 0
+    # Agents as configured, then infinitely-lived agents that may have no metabolism
+    storeCases = ({}, {"agentMaxAge": [-1, -1], "agentSpiceMetabolism": [0, 2], "agentSugarMetabolism": [0, 2]})
+    for storeCase in storeCases:
+        for seed in range(options["seeds"]):
+            # Enforce noninteractive, no-output mode with universal income, leaving out inheritance since it moves resources between agents as they die
+            storeOptions = dict(configuration)
+            storeOptions.update({"debugMode": ["none"], "agentArrayStore": True, "agentInheritancePolicy": "none", "agentUniversalSpice": [0, 2],
+                                 "agentUniversalSugar": [0, 3], "environmentUniversalSpiceIncomeInterval": 3, "environmentUniversalSugarIncomeInterval": 2,
+                                 "logfile": None, "seed": seed, "timingMode": "none"})
+            storeOptions.update(storeCase)
+            # Twin simulations step alike, so one can run each phase batched and the other agent by agent
+            batchS = sugarscape.Sugarscape(sugarscape.createConfiguration(storeOptions))
+            agentS = sugarscape.Sugarscape(sugarscape.createConfiguration(storeOptions))
+            mismatches = 0
+            checks = 0
+            # Phases are checked on the starting agents too, before batched phases have changed their fields
+            for timestep in range(options["timesteps"]):
+                if findAgentStates(batchS.agents) != findAgentStates(agentS.agents):
+                    print(f"Seed {seed}: twin simulations diverge at timestep {batchS.timestep}")
+                    mismatches += 1
+                    break
+                for phase in storePhases:
+                    if checkStorePhase(batchS, agentS, phase) == False:
+                        print(f"Seed {seed}: batched {phase} differs from agent-by-agent {phase} at timestep {batchS.timestep}")
+                        mismatches += 1
+                    checks += 1
+                batchS.stepSimulation(1)
+                agentS.stepSimulation(1)
+            totalMismatches += mismatches
+            caseOptions = ", ".join(sorted(storeCase)) if len(storeCase) > 0 else "no options"
+            print(f"Seed {seed} overriding {caseOptions}: {mismatches} mismatches in {checks} phases")
+    exit(1 if totalMismatches > 0 else 0)
@@ -0,0 +1,78 @@
+import csv
+import json
+import os
+import sys
+import tempfile
+
+# Simulation modules live in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import commandline
+import sugarscape
+
+def checkForkedLogs(configuration, forkConfigurations, timesteps, logfileFormat):
+    failures = 0
+    forks = len(forkConfigurations)
+    logDirectory = tempfile.mkdtemp()
+    warmupLogfile = os.path.join(logDirectory, f"warmup.{logfileFormat}")
+    # Enforce noninteractive, no-output mode
+    forkOptions = dict(configuration)
+    forkOptions.update({"debugMode": ["none"], "logfile": warmupLogfile, "logfileFormat": logfileFormat, "timesteps": timesteps,
+                        "forkTimestep": timesteps // 2, "forkConfigurations": [dict(forkConfiguration) for forkConfiguration in forkConfigurations],
+                        "checkpointInterval": 0})
+    S = sugarscape.Sugarscape(sugarscape.createConfiguration(forkOptions))
+    if S.runSimulation(timesteps) != 0:
+        print("Forked simulations failed.")
+        failures += 1
+    logfiles = [warmupLogfile] + [os.path.join(logDirectory, f"warmup_fork{fork}.{logfileFormat}") for fork in range(forks)]
+    logs = []
+    for logfile in logfiles:
+        try:
+            logFile = open(logfile)
+            # Rows of CSV logs keep their header as the first row
+            log = list(csv.reader(logFile)) if logfileFormat == "csv" else json.load(logFile)
+            logFile.close()
+            logs.append(log)
+        except (OSError, ValueError) as err:
+            print(f"Could not load {os.path.basename(logfile)}: {err}")
+            logs.append(None)
+            failures += 1
+    for logfile, log in zip(logfiles, logs):
+        # Every timestep logs the same statistics, even when a fork changes the experimental group
+        if log != None and any(len(row) != len(log[0]) if logfileFormat == "csv" else list(row) != list(log[0]) for row in log):
+            print(f"Statistics logged in {os.path.basename(logfile)} change between timesteps.")
+            failures += 1
+    warmupLog = logs[0]
+    if warmupLog != None:
+        # The warm-up ends at the fork, so each continuation shares every timestep of the warm-up but the last
+        finalTimestep = int(warmupLog[-1][warmupLog[0].index("timestep")]) if logfileFormat == "csv" else warmupLog[-1]["timestep"]
+        if finalTimestep != forkOptions["forkTimestep"]:
+            print(f"Warm-up log ends at timestep {finalTimestep} instead of the fork.")
+            failures += 1
+        for fork in range(forks):
+            forkLog = logs[fork + 1]
+            if forkLog != None and forkLog[:len(warmupLog) - 1] != warmupLog[:-1]:
+                print(f"Log of fork {fork} does not start with the warm-up log.")
+                failures += 1
+    for logfile in logfiles:
+        if os.path.exists(logfile):
+            os.remove(logfile)
+    os.rmdir(logDirectory)
+    return failures
+
+if __name__ == "__main__":
+    scriptOptions = (("f", "forks", "forks", "number of forks", int, "Fork the specified number of simulations halfway through."),
+                     ("t", "timesteps", "timesteps", "number of timesteps", int, "Run the specified number of timesteps."))
+    options = commandline.parseOptions("fork.py", scriptOptions, {"forks": 2, "timesteps": 20})
+    configuration = commandline.readConfiguration(options["config"])
+    # Forks that differ only in their seed, then forks that log an experimental group the warm-up does not
+    experimentalGroups = ("female", "male", None)
+    forkCases = [("json", [{"seed": fork} for fork in range(options["forks"])]),
+                 ("csv", [{"experimentalGroup": experimentalGroups[fork % len(experimentalGroups)]} for fork in range(options["forks"])]),
+                 ("json", [{"experimentalGroup": experimentalGroups[fork % len(experimentalGroups)]} for fork in range(options["forks"])])]
+    totalFailures = 0
+    for logfileFormat, forkConfigurations in forkCases:
+        failures = checkForkedLogs(configuration, forkConfigurations, options["timesteps"], logfileFormat)
+        totalFailures += failures
+        print(f"{options['forks']} {logfileFormat} forks over {options['timesteps']} timesteps overriding {', '.join(sorted(forkConfigurations[0]))}: {failures} failures")
+    exit(1 if totalFailures > 0 else 0)
@@ -0,0 +1,59 @@
+import os
+import sys
+
+# Simulation modules live in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import commandline
+import sugarscape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Small bounded grids are included since their cardinal ranges wrap and can reach a cell at more than one distance
+geometries = ((6, 9, False), (9, 6, False), (8, 8, False), (8, 8, True), (25, 25, False), (25, 25, True))
+rangeModes = ("cardinal", "radial")
+
+def checkOccupiedCellCounts(S):
+    environment = S.environment
+    mismatches = 0
+    queries = 0
+    cellRanges = list(range(1, environment.maxCellDistance + 1))
+    # Query ranges both ways so counts cannot depend on the widest range queried so far
+    for cellRange in cellRanges + cellRanges[::-1]:
+        for i in range(environment.width):
+            for j in range(environment.height):
+                cell = environment.findCell(i, j)
+                expected = len(environment.findOccupiedCellsInRange(cell, cellRange))
+                if environment.findOccupiedCellCount(cell, cellRange) != expected:
+                    mismatches += 1
+                queries += 1
+    return mismatches, queries
+
+if __name__ == "__main__":
+    scriptOptions = (("t", "timesteps", "timesteps", "number of timesteps", int, "Check counts after each of the specified number of timesteps."),)
+    options = commandline.parseOptions("occupancy.py", scriptOptions, {"timesteps": 5})
+    configuration = commandline.readConfiguration(options["config"])
+    arrayGrids = (False, True) if numpy != None else (False,)
+    totalMismatches = 0
+    for width, height, wraparound in geometries:
+        for rangeMode in rangeModes:
+            for arrayGrid in arrayGrids:
+                # Enforce noninteractive, no-output mode
+                geometryOptions = dict(configuration)
+                geometryOptions.update({"debugMode": ["none"], "environmentArrayGrid": arrayGrid, "environmentWidth": width,
+                                        "environmentHeight": height, "environmentWraparound": wraparound, "agentVisionMode": rangeMode,
+                                        "agentMovementMode": rangeMode, "logfile": None, "startingAgents": (width * height) // 4})
+                S = sugarscape.Sugarscape(sugarscape.createConfiguration(geometryOptions))
+                mismatches = 0
+                queries = 0
+                for timestep in range(options["timesteps"]):
+                    S.stepSimulation(1)
+                    stepMismatches, stepQueries = checkOccupiedCellCounts(S)
+                    mismatches += stepMismatches
+                    queries += stepQueries
+                totalMismatches += mismatches
+                print(f"{width}x{height} wraparound={wraparound} {rangeMode} arrayGrid={arrayGrid}: {mismatches} mismatches in {queries} queries")
+    exit(1 if totalMismatches > 0 else 0)
@@ -0,0 +1,61 @@
+import os
+import sys
+
+# Simulation modules live in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import commandline
+import sugarscape
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+rangeModes = ("cardinal", "radial")
+
+def checkRankedCells(S):
+    mismatches = 0
+    rankings = 0
+    for agent in S.agents:
+        # Agents the array path hands back to the per-cell path have nothing to compare
+        staleTribe = agent.tagPreferences == True and agent.tags != None and len(agent.tags) > 0 and agent.tribe != agent.findTribe()
+        if agent.isAlive() == False or staleTribe == True:
+            continue
+        for bestOnly in (False, True):
+            # Both paths draw the same random numbers, so each ranks from the same generator state
+            randomState = S.random.getstate()
+            arrayCells = agent.rankCellsInRangeArray(bestOnly)
+            S.random.setstate(randomState)
+            objectCells = agent.rankCellsInRangeObject(bestOnly)
+            arrayRanking = [(cell["cell"], cell["range"], cell["wealth"]) for cell in arrayCells]
+            objectRanking = [(cell["cell"], cell["range"], cell["wealth"]) for cell in objectCells]
+            if arrayRanking != objectRanking:
+                mismatches += 1
+            rankings += 1
+    return mismatches, rankings
+
+if __name__ == "__main__":
+    scriptOptions = (("t", "timesteps", "timesteps", "number of timesteps", int, "Check rankings after each of the specified number of timesteps."),)
+    options = commandline.parseOptions("ranking.py", scriptOptions, {"timesteps": 10})
+    configuration = commandline.readConfiguration(options["config"])
+    if numpy == None:
+        print("NumPy is required to rank cells over arrays.")
+        exit(1)
+    totalMismatches = 0
+    for rangeMode in rangeModes:
+        # Enforce noninteractive, no-output mode with combat so prey rewards are ranked too
+        rankingOptions = dict(configuration)
+        rankingOptions.update({"debugMode": ["none"], "environmentArrayGrid": True, "agentVisionMode": rangeMode, "agentMovementMode": rangeMode,
+                               "agentAggressionFactor": [0, 1], "logfile": None})
+        S = sugarscape.Sugarscape(sugarscape.createConfiguration(rankingOptions))
+        mismatches = 0
+        rankings = 0
+        for timestep in range(options["timesteps"]):
+            S.stepSimulation(1)
+            stepMismatches, stepRankings = checkRankedCells(S)
+            mismatches += stepMismatches
+            rankings += stepRankings
+        totalMismatches += mismatches
+        print(f"{rangeMode}: {mismatches} mismatches in {rankings} rankings")
+    exit(1 if totalMismatches > 0 else 0)
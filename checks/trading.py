@@ -0,0 +1,41 @@
+import json
+import os
+import sys
+
+# Simulation modules live in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import commandline
+import sugarscape
+
+def runTrades(configuration, tradeBisection, seed, timesteps):
+    # Enforce noninteractive, no-output mode with phase timing off so logged statistics only hold simulation outcomes
+    tradeOptions = dict(configuration)
+    tradeOptions.update({"debugMode": ["none"], "agentTradeBisection": tradeBisection, "logfile": None, "seed": seed, "timingMode": "none"})
+    S = sugarscape.Sugarscape(sugarscape.createConfiguration(tradeOptions))
+    S.runSimulation(timesteps)
+    return [json.dumps(runtimeStats, sort_keys=True) for runtimeStats in S.runtimeStatsHistory]
+
+def checkTrades(configuration, seed, timesteps):
+    transactionStats = runTrades(configuration, False, seed, timesteps)
+    bisectionStats = runTrades(configuration, True, seed, timesteps)
+    for timestep, (transactionRuntimeStats, bisectionRuntimeStats) in enumerate(zip(transactionStats, bisectionStats)):
+        if transactionRuntimeStats != bisectionRuntimeStats:
+            return timestep
+    if len(transactionStats) != len(bisectionStats):
+        return min(len(transactionStats), len(bisectionStats))
+    return None
+
+if __name__ == "__main__":
+    scriptOptions = (("s", "seeds", "seeds", "number of seeds", int, "Compare trading engines over the specified number of seeds."),
+                     ("t", "timesteps", "timesteps", "number of timesteps", int, "Run the specified number of timesteps."))
+    options = commandline.parseOptions("trading.py", scriptOptions, {"seeds": 3, "timesteps": 50})
+    configuration = commandline.readConfiguration(options["config"])
+    mismatches = 0
+    for seed in range(options["seeds"]):
+        mismatchTimestep = checkTrades(configuration, seed, options["timesteps"])
+        if mismatchTimestep != None:
+            print(f"Seed {seed}: trading by bisection diverges from trading by transaction at timestep {mismatchTimestep}")
+            mismatches += 1
+    print(f"{options['seeds']} seeds over {options['timesteps']} timesteps: {mismatches} mismatches")
+    exit(1 if mismatches > 0 else 0)
@@ -0,0 +1,49 @@
+import getopt
+import json
+import sys
+
+# Script options are given as (short option, long option, option name, value name, value type, help text)
+configurationOption = ("c", "conf", "config", "configuration file", str, "Use the specified path to configurable settings file.")
+
+def parseOptions(script, scriptOptions, defaults):
+    # Every script requires a configuration file
+    scriptOptions = (configurationOption,) + tuple(scriptOptions)
+    options = {"config": None}
+    options.update(defaults)
+    shortOptions = "".join(f"{scriptOption[0]}:" for scriptOption in scriptOptions) + "h"
+    longOptions = tuple(f"{scriptOption[1]}=" for scriptOption in scriptOptions) + ("help",)
+    try:
+        args, vals = getopt.getopt(sys.argv[1:], shortOptions, longOptions)
+    except getopt.GetoptError as err:
+        print(err)
+        exit(0)
+    for currArg, currVal in args:
+        if currArg in ("-h", "--help"):
+            printHelp(script, scriptOptions)
+        for shortOption, longOption, name, valueName, valueType, helpText in scriptOptions:
+            if currArg in (f"-{shortOption}", f"--{longOption}"):
+                if currVal == "":
+                    print(f"No {valueName} provided.")
+                    printHelp(script, scriptOptions)
+                options[name] = valueType(currVal)
+    if options["config"] == None:
+        print("Configuration file path required.")
+        printHelp(script, scriptOptions)
+    return options
+
+def printHelp(script, scriptOptions):
+    helpString = f"Usage:\n\tpython {script} --conf /path/to/config\n\nOptions:\n"
+    for shortOption, longOption, name, valueName, valueType, helpText in scriptOptions:
+        helpString += f"\t-{shortOption},--{longOption}\t{helpText}\n"
+    helpString += "\t-h,--help\tDisplay this message."
+    print(helpString)
+    exit(0)
+
+def readConfiguration(configPath):
+    configFile = open(configPath)
+    configuration = json.loads(configFile.read())
+    configFile.close()
+    # Data collection configurations keep simulation options separately
+    if "sugarscapeOptions" in configuration:
+        configuration = configuration["sugarscapeOptions"]
+    return configuration
@@ -1,5 +1,15 @@
 import math
 
+def findPackedBits(bits):
+    # Pack a list of bits into an integer with the first bit in the least significant position
+    if bits == None:
+        return 0
+    packedBits = 0
+    for position in range(len(bits)):
+        if bits[position] == 1:
+            packedBits |= 1 << position
+    return packedBits
+
 class Condition:
     def __init__(self, conditionID, configuration):
         self.ID = conditionID
@@ -47,6 +57,7 @@ class Disease(Condition):
         self.startTimestep = configuration["startTimestep"]
         self.sugarMetabolismPenalty = configuration["sugarMetabolismPenalty"]
         self.tags = configuration["tags"]
+        self.tagBits = findPackedBits(self.tags)
         self.transmissionChance = configuration["transmissionChance"]
         self.visionPenalty = configuration["visionPenalty"]
         self.infected = []
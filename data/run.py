@@ -7,6 +7,11 @@ import random
 import sys
 import time
 
+# Simulation modules live in the parent directory
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import batch
+
 def createConfigurations(config, path, mode="json"):
     configs = getJobsToDo(config, path)
     if len(configs) == 0:
@@ -30,6 +35,8 @@ def createConfigurations(config, path, mode="json"):
                 else:
                     simOpts["logfile"] = f"{path}{modelString}{seed}.csv"
                     simOpts["logfileFormat"] = "csv"
+                simOpts["checkpointFile"] = f"{path}{modelString}{seed}.checkpoint"
+                simOpts["checkpointInterval"] = dataOpts["checkpointInterval"]
                 # Enforce noninteractive, no-output mode
                 simOpts["headlessMode"] = True
                 simOpts["debugMode"] = ["none"]
@@ -71,6 +78,7 @@ def getJobsToDo(config, path):
         configFile = open(config)
         rawConf = json.loads(configFile.read())
         log = rawConf["logfile"]
+        checkpoint = rawConf.get("checkpointFile", None)
         configFile.close()
         if os.path.exists(log) == False:
             print(f"Configuration file {config} has no matching log. Adding it to be rerun.")
@@ -85,10 +93,16 @@ def getJobsToDo(config, path):
             logFile.close()
             if int(lastEntry["timestep"]) == int(rawConf["timesteps"]) or int(lastEntry["population"]) == 0:
                 completedRuns.append(config)
+            elif checkpoint != None and os.path.exists(checkpoint):
+                print(f"Existing log {log} is incomplete. Adding it to be resumed from its checkpoint.")
             else:
                 print(f"Existing log {log} is incomplete. Adding it to be rerun.")
                 os.remove(log)
         except:
+            # Logs cut short are not valid JSON but may still be resumed from a checkpoint
+            if checkpoint != None and os.path.exists(checkpoint):
+                print(f"Existing log {log} is incomplete. Adding it to be resumed from its checkpoint.")
+                continue
             print(f"Existing log {log} is incomplete. Adding it to be rerun.")
             os.remove(log)
             continue
@@ -137,19 +151,23 @@ def printHelp():
     print("Usage:\n\tpython run.py --conf /path/to/config\n\nOptions:\n\t-c,--conf\tUse the specified path to configurable settings file.\n\t-m,--mode\tUse the specified file format for simulation logs.\n\t-p,--path\tUse the specified directory path to store dataset JSON files.\n\t-h,--help\tDisplay this message.")
     exit(0)
 
-def runSimulation(configFile, pythonAlias, jobNumber, totalJobs):
+def runSimulation(configFile, jobNumber, totalJobs):
     print(f"Running decision model {configFile} ({jobNumber}/{totalJobs})")
-    os.system(f"{pythonAlias} ../sugarscape.py --conf {configFile} &> /dev/null")
+    conf = open(configFile)
+    simOpts = json.loads(conf.read())
+    conf.close()
+    simOpts["checkpointResume"] = True
+    # Simulations run inside the long-lived pool workers so each worker reuses the environment geometry it has already built
+    batch.runSimulationSafely(simOpts)
 
 def runSimulations(config, configFiles):
     dataOpts = config["dataCollectionOptions"]
-    pythonAlias = dataOpts["pythonAlias"]
     totalSimJobs = len(configFiles)
     jobUpdateFrequency = dataOpts["jobUpdateFrequency"]
 
     # Submit simulation jobs to local worker pool
     pool = multiprocessing.Pool(processes = dataOpts["numParallelSimJobs"])
-    results = [pool.apply_async(runSimulation, args = (configFile, pythonAlias, i + 1, totalSimJobs)) for i, configFile in enumerate(configFiles)]
+    results = [pool.apply_async(runSimulation, args = (configFile, i + 1, totalSimJobs)) for i, configFile in enumerate(configFiles)]
 
     # Wait for jobs to finish
     pool.apply(finishSimulations)
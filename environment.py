@@ -1,12 +1,22 @@
 import math
 import random
+import types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class Environment:
     # Assumption: grid is always indexed by [width][height]
+    # Caches rebuilt on demand are written to checkpoints empty
+    checkpointCaches = ("rangeOffsets",)
+
     def __init__(self, height, width, sugarscape, configuration):
         self.width = width
         self.height = height
         self.sugarscape = sugarscape
+        self.arrayGrid = configuration["arrayGrid"]
         self.equator = configuration["equator"] if configuration["equator"] >= 0 else math.ceil(self.height / 2)
         self.globalMaxSpice = configuration["globalMaxSpice"]
         self.globalMaxSugar = configuration["globalMaxSugar"]
@@ -33,11 +43,79 @@ class Environment:
         self.universalSpiceIncomeInterval = configuration["universalSpiceIncomeInterval"]
         self.universalSugarIncomeInterval = configuration["universalSugarIncomeInterval"]
         self.wraparound = configuration["wraparound"]
+        self.cellNeighborWealth = []
+        self.cellReverseNeighbors = {}
         self.maxCellDistance = 0
+        self.maxDeltaX = 0
+        self.maxDeltaY = 0
+        self.occupancyCountRange = 0
+        self.occupancyCounts = []
+        self.occupancyTiles = []
+        self.occupancyTileSize = 0
+        self.radialRanges = False
+        self.rangeOffsets = {}
+        self.rangeStencil = []
         self.timestep = 0
+        self.xOccupancyTileWindows = []
+        self.xRangeWindows = []
+        self.yOccupancyTileWindows = []
+        self.yRangeWindows = []
 
         # Populate grid with NoneType objects
         self.grid = [[None for j in range(height)]for i in range(width)]
+        if self.arrayGrid == True:
+            self.createCellArrays()
+
+    def addOccupiedCell(self, cell):
+        if self.occupancyTileSize == 0:
+            return
+        tile = self.occupancyTiles[cell.x // self.occupancyTileSize][cell.y // self.occupancyTileSize]
+        if cell not in tile:
+            tile.add(cell)
+            self.updateOccupancyCounts(cell, 1)
+
+    def createCellArrays(self):
+        numCells = self.width * self.height
+        # Keep integer resources as integers so array-backed cells report the same values as plain cells
+        spiceType = numpy.int64 if type(self.spiceRegrowRate) == int else numpy.float64
+        sugarType = numpy.int64 if type(self.sugarRegrowRate) == int else numpy.float64
+        self.cellMaxSpice = numpy.zeros(numCells, dtype=spiceType)
+        self.cellMaxSugar = numpy.zeros(numCells, dtype=sugarType)
+        self.cellNeighborCounts = numpy.zeros(numCells, dtype=numpy.int64)
+        self.cellNeighborStencil = []
+        self.cellPollution = numpy.zeros(numCells, dtype=numpy.float64)
+        self.cellPollutionFlux = numpy.zeros(numCells, dtype=numpy.float64)
+        self.cellSeasons = numpy.zeros(numCells, dtype=numpy.int8)
+        self.cellSpice = numpy.zeros(numCells, dtype=spiceType)
+        self.cellSpiceLastProduced = numpy.zeros(numCells, dtype=spiceType)
+        self.cellSugar = numpy.zeros(numCells, dtype=sugarType)
+        self.cellSugarLastProduced = numpy.zeros(numCells, dtype=sugarType)
+        # Float resources also mark which cells plain cells would hold as integers, such as capped maximums and unproduced resources
+        self.cellMaxSpiceIntegers = numpy.zeros(numCells, dtype=bool) if spiceType == numpy.float64 else []
+        self.cellMaxSugarIntegers = numpy.zeros(numCells, dtype=bool) if sugarType == numpy.float64 else []
+        self.cellSpiceIntegers = numpy.zeros(numCells, dtype=bool) if spiceType == numpy.float64 else []
+        self.cellSpiceLastProducedIntegers = numpy.zeros(numCells, dtype=bool) if spiceType == numpy.float64 else []
+        self.cellSugarIntegers = numpy.zeros(numCells, dtype=bool) if sugarType == numpy.float64 else []
+        self.cellSugarLastProducedIntegers = numpy.zeros(numCells, dtype=bool) if sugarType == numpy.float64 else []
+
+    def createCellNeighborWealth(self):
+        # Sum neighbor wealth in the same direction order as Cell.findNeighborWealth
+        if self.arrayGrid == True:
+            cellWealth = self.cellSugar + self.cellSpice
+            self.cellNeighborWealth = numpy.zeros(self.width * self.height, dtype=cellWealth.dtype)
+            for neighborIndices, hasNeighbor in self.cellNeighborStencil:
+                self.cellNeighborWealth += numpy.where(hasNeighbor, cellWealth[neighborIndices], 0)
+        else:
+            self.cellNeighborWealth = [self.grid[i][j].findNeighborWealth() for i in range(self.width) for j in range(self.height)]
+        if len(self.cellReverseNeighbors) == 0:
+            # Neighbors are not always mutual without wraparound, so keep which cells count each cell as a neighbor
+            for i in range(self.width):
+                for j in range(self.height):
+                    self.cellReverseNeighbors[self.grid[i][j]] = []
+            for i in range(self.width):
+                for j in range(self.height):
+                    for neighbor in self.grid[i][j].neighbors.values():
+                        self.cellReverseNeighbors[neighbor].append(self.grid[i][j])
 
     def createDistanceTable(self, maxDeltaX, maxDeltaY):
         distanceTable = {}
@@ -54,7 +132,50 @@ class Environment:
                 distanceTable[deltaPair] = math.sqrt(lowerDelta ** 2 + upperDelta ** 2)
         return distanceTable
 
-    def doCellUpdate(self):
+    def createOccupancyCounts(self, cellRange):
+        # Occupied cells are counted at their range band from each cell, which only needs each occupied cell's own bands since bands are symmetric
+        numCells = self.width * self.height
+        self.occupancyCountRange = cellRange
+        if self.arrayGrid == True:
+            self.occupancyCounts = numpy.zeros((cellRange + 1, numCells), dtype=numpy.int64)
+        else:
+            self.occupancyCounts = [[0 for i in range(numCells)] for gridRange in range(cellRange + 1)]
+        for column in self.occupancyTiles:
+            for tile in column:
+                for cell in tile:
+                    self.updateOccupancyCounts(cell, 1)
+
+    def doCellArrayUpdate(self):
+        # Season codes follow the ordering in ArrayCell.seasons
+        wet = 1
+        dry = 2
+        growbackCells = True
+        if self.seasonInterval > 0:
+            # Growback depends on the season before any seasonal change this timestep
+            growbackCells = (self.cellSeasons == wet) | ((self.cellSeasons == dry) & (self.seasonalGrowbackCountdown == self.seasonalGrowbackDelay))
+            if self.timestep % self.seasonInterval == 0:
+                self.cellSeasons[:] = numpy.where(self.cellSeasons == wet, dry, wet)
+        sugarProduced = self.cellSugar + self.sugarRegrowRate != self.cellSugar
+        spiceProduced = self.cellSpice + self.spiceRegrowRate != self.cellSpice
+        sugarLastProduced = numpy.where(sugarProduced, self.sugarRegrowRate, 0)
+        spiceLastProduced = numpy.where(spiceProduced, self.spiceRegrowRate, 0)
+        sugarRegrowth = numpy.minimum(self.cellSugar + self.sugarRegrowRate, self.cellMaxSugar)
+        spiceRegrowth = numpy.minimum(self.cellSpice + self.spiceRegrowRate, self.cellMaxSpice)
+        # Plain cells record an integer when nothing is produced and keep the maximum's type only when growth passes it
+        if len(self.cellSugarIntegers) > 0:
+            sugarIntegers = (self.cellSugar + self.sugarRegrowRate > self.cellMaxSugar) & self.cellMaxSugarIntegers
+            numpy.copyto(self.cellSugarLastProducedIntegers, sugarProduced == False, where=growbackCells)
+            numpy.copyto(self.cellSugarIntegers, sugarIntegers, where=growbackCells)
+        if len(self.cellSpiceIntegers) > 0:
+            spiceIntegers = (self.cellSpice + self.spiceRegrowRate > self.cellMaxSpice) & self.cellMaxSpiceIntegers
+            numpy.copyto(self.cellSpiceLastProducedIntegers, spiceProduced == False, where=growbackCells)
+            numpy.copyto(self.cellSpiceIntegers, spiceIntegers, where=growbackCells)
+        numpy.copyto(self.cellSugarLastProduced, sugarLastProduced, where=growbackCells)
+        numpy.copyto(self.cellSpiceLastProduced, spiceLastProduced, where=growbackCells)
+        numpy.copyto(self.cellSugar, sugarRegrowth, where=growbackCells)
+        numpy.copyto(self.cellSpice, spiceRegrowth, where=growbackCells)
+
+    def doCellObjectUpdate(self):
         for i in range(self.width):
             for j in range(self.height):
                 cellCurrSugar = self.grid[i][j].sugar
@@ -90,13 +211,35 @@ class Environment:
                         self.grid[i][j].spiceLastProduced = 0
                     self.grid[i][j].sugar = sugarRegrowth
                     self.grid[i][j].spice = spiceRegrowth
+
+    def doCellUpdate(self):
+        if self.arrayGrid == True:
+            self.doCellArrayUpdate()
+        else:
+            self.doCellObjectUpdate()
+        # Neighbor wealth is found again on the first query after growback
+        self.cellNeighborWealth = []
         if self.pollutionDiffusionStart <= self.timestep <= self.pollutionDiffusionEnd and self.pollutionDiffusionDelay > 0 and self.pollutionDiffusionCountdown == self.pollutionDiffusionDelay:
-            for i in range(self.height):
-                for j in range(self.width):
-                    self.grid[i][j].findPollutionFlux()
-            for i in range(self.height):
-                for j in range(self.width):
-                    self.grid[i][j].doPollutionDiffusion()
+            if self.arrayGrid == True:
+                self.doPollutionArrayDiffusion()
+            else:
+                self.doPollutionObjectDiffusion()
+
+    def doPollutionArrayDiffusion(self):
+        # Accumulate neighbor pollution in the same direction order as Cell.findPollutionFlux
+        neighborPollution = numpy.zeros(self.width * self.height, dtype=numpy.float64)
+        for neighborIndices, hasNeighbor in self.cellNeighborStencil:
+            neighborPollution += numpy.where(hasNeighbor, self.cellPollution[neighborIndices], 0)
+        self.cellPollutionFlux[:] = neighborPollution / self.cellNeighborCounts
+        self.cellPollution[:] = self.cellPollutionFlux
+
+    def doPollutionObjectDiffusion(self):
+        for i in range(self.height):
+            for j in range(self.width):
+                self.grid[i][j].findPollutionFlux()
+        for i in range(self.height):
+            for j in range(self.width):
+                self.grid[i][j].doPollutionDiffusion()
 
     def doTimestep(self, timestep):
         self.timestep = timestep
@@ -104,18 +247,52 @@ class Environment:
         self.updatePollution()
         self.doCellUpdate()
 
-    def findCardinalCellRanges(self, maxDeltaX, maxDeltaY, cellCoords):
-        numCells = self.width * self.height
-        for i in range(numCells):
-            x1, y1 = cellCoords[i]
-            for j in range(x1 + 1, x1 + maxDeltaX + 1):
-                deltaX = self.findWraparoundDistance(j - x1, self.width)
-                self.grid[x1][y1].ranges[deltaX][self.grid[j % self.width][y1]] = deltaX
-                self.grid[j % self.width][y1].ranges[deltaX][self.grid[x1][y1]] = deltaX
-            for j in range(y1 + 1, y1 + maxDeltaY + 1):
-                deltaY = self.findWraparoundDistance(j - y1, self.height)
-                self.grid[x1][y1].ranges[deltaY][self.grid[x1][j % self.height]] = deltaY
-                self.grid[x1][j % self.height].ranges[deltaY][self.grid[x1][y1]] = deltaY
+    def findAxisCellWindows(self, maxDelta, border):
+        # For each coordinate, list the reachable coordinates along one axis in ascending order with their distance
+        axisWindows = []
+        for coordinate in range(border):
+            window = {}
+            for offset in range(-1 * maxDelta, maxDelta + 1):
+                neighborCoordinate = coordinate + offset
+                if self.wraparound == True:
+                    neighborCoordinate = neighborCoordinate % border
+                elif neighborCoordinate < 0 or neighborCoordinate >= border:
+                    continue
+                delta = self.findWraparoundDistance(coordinate - neighborCoordinate, border)
+                if delta <= maxDelta:
+                    window[neighborCoordinate] = delta
+            axisWindows.append(sorted(window.items()))
+        return axisWindows
+
+    def findAxisTileWindows(self, maxDelta, border):
+        # For each coordinate, list the occupancy tiles along one axis that may hold cells within range
+        axisWindows = []
+        for coordinate in range(border):
+            window = set()
+            for offset in range(-1 * maxDelta, maxDelta + 1):
+                window.add(((coordinate + offset) % border) // self.occupancyTileSize)
+            axisWindows.append(sorted(window))
+        return axisWindows
+
+    def findCardinalCellsInRange(self, cell, cellRange):
+        cellsInRange = {}
+        for delta in range(1, cellRange + 1):
+            # Sort by grid position and axis to keep the order cells are reached in a cardinal sweep of the grid
+            rangeCells = []
+            if delta <= self.maxDeltaX:
+                east = self.grid[(cell.x + delta) % self.width][cell.y]
+                west = self.grid[(cell.x - delta) % self.width][cell.y]
+                rangeCells.append((cell.x * self.height + cell.y, 0, east))
+                rangeCells.append((west.x * self.height + west.y, 0, west))
+            if delta <= self.maxDeltaY:
+                south = self.grid[cell.x][(cell.y + delta) % self.height]
+                north = self.grid[cell.x][(cell.y - delta) % self.height]
+                rangeCells.append((cell.x * self.height + cell.y, 1, south))
+                rangeCells.append((north.x * self.height + north.y, 1, north))
+            rangeCells.sort(key=lambda rangeCell: (rangeCell[0], rangeCell[1]))
+            for rangeCell in rangeCells:
+                cellsInRange[rangeCell[2]] = delta
+        return cellsInRange
 
     def findCell(self, x, y):
         return self.grid[x][y]
@@ -124,8 +301,205 @@ class Environment:
         for i in range(self.width):
             for j in range(self.height):
                 self.grid[i][j].findNeighbors(self.neighborhoodMode)
+        if self.arrayGrid == True:
+            self.findCellNeighborStencil()
+
+    def findCellAtIndex(self, index):
+        return self.grid[index // self.height][index % self.height]
+
+    def findCellNeighborStencil(self):
+        # Neighbor indices are read from the cells so edge handling always matches Cell.findNeighbors
+        numCells = self.width * self.height
+        directions = ["north", "south", "east", "west", "northeast", "northwest", "southeast", "southwest"]
+        self.cellNeighborCounts[:] = 0
+        self.cellNeighborStencil = []
+        for direction in directions:
+            neighborIndices = numpy.full(numCells, -1, dtype=numpy.int64)
+            for i in range(self.width):
+                for j in range(self.height):
+                    cell = self.grid[i][j]
+                    if direction in cell.neighbors:
+                        neighborIndices[cell.index] = cell.neighbors[direction].index
+            hasNeighbor = neighborIndices >= 0
+            if hasNeighbor.any() == False:
+                continue
+            self.cellNeighborStencil.append((numpy.where(hasNeighbor, neighborIndices, 0), hasNeighbor))
+            self.cellNeighborCounts += hasNeighbor
+
+    def findCellNeighborWealth(self, cell):
+        if len(self.cellNeighborWealth) == 0:
+            self.createCellNeighborWealth()
+        if self.arrayGrid == True:
+            return self.cellNeighborWealth.item(cell.index)
+        return self.cellNeighborWealth[cell.x * self.height + cell.y]
+
+    def findCellOffset(self, cell, neighborCell):
+        return ((neighborCell.x - cell.x) % self.width, (neighborCell.y - cell.y) % self.height)
 
     def findCellRanges(self):
+        config = self.sugarscape.configuration
+        maxDeltaX, maxDeltaY, maxRadialDelta = self.findRangeLimits()
+        maxCardinalDelta = max(maxDeltaX, maxDeltaY)
+        self.maxDeltaX = maxDeltaX
+        self.maxDeltaY = maxDeltaY
+        self.radialRanges = config["agentVisionMode"] == "radial" and config["agentMovementMode"] == "radial"
+        self.maxCellDistance = maxRadialDelta if self.radialRanges == True else maxCardinalDelta
+        self.rangeOffsets = {}
+        if self.radialRanges == True:
+            self.findRadialRangeStencil(maxDeltaX, maxDeltaY, maxRadialDelta)
+        self.findOccupancyTiles()
+
+    def findCellRangeArrays(self, cell, cellRange):
+        # Distances and cell indices of a range view in order, for batched lookups into the cell arrays
+        rangeOffsets = self.findCellRangeOffsets(cell, cellRange)
+        rangeIndices = ((cell.x + rangeOffsets["xOffsets"]) % self.width) * self.height + (cell.y + rangeOffsets["yOffsets"]) % self.height
+        return rangeOffsets["distances"], rangeIndices, rangeOffsets["distanceArray"]
+
+    def findCellRangeBands(self, cell, cellRange):
+        # Cardinal ranges wrap even on bounded grids, so a cell can be reached at several distances and belongs to the band first reaching it
+        if self.radialRanges == True:
+            return {neighborCell: math.floor(distance) for neighborCell, distance in self.findCellsInRange(cell, cellRange).items()}
+        rangeBands = {}
+        for delta in range(1, cellRange + 1):
+            if delta <= self.maxDeltaX:
+                rangeBands.setdefault(self.grid[(cell.x + delta) % self.width][cell.y], delta)
+                rangeBands.setdefault(self.grid[(cell.x - delta) % self.width][cell.y], delta)
+            if delta <= self.maxDeltaY:
+                rangeBands.setdefault(self.grid[cell.x][(cell.y + delta) % self.height], delta)
+                rangeBands.setdefault(self.grid[cell.x][(cell.y - delta) % self.height], delta)
+        return rangeBands
+
+    def findCellRangeOffsets(self, cell, cellRange):
+        # Cells away from the borders reach the same offsets in the same order, so they share one entry per range instead of one each
+        xDelta = min(cellRange, self.maxDeltaX)
+        yDelta = min(cellRange, self.maxDeltaY)
+        xClass = cell.x if cell.x < xDelta or cell.x >= self.width - xDelta else -1
+        yClass = cell.y if cell.y < yDelta or cell.y >= self.height - yDelta else -1
+        rangeKey = (cellRange, xClass, yClass)
+        if rangeKey not in self.rangeOffsets:
+            cellsInRange = self.findCellsInRange(cell, cellRange)
+            offsets = [self.findCellOffset(cell, neighborCell) for neighborCell in cellsInRange]
+            rangeOffsets = {"distances": list(cellsInRange.values()), "positions": {offset: position for position, offset in enumerate(offsets)}}
+            if self.arrayGrid == True:
+                rangeOffsets["distanceArray"] = numpy.array(rangeOffsets["distances"], dtype=numpy.float64)
+                rangeOffsets["xOffsets"] = numpy.array([offset[0] for offset in offsets], dtype=numpy.int64)
+                rangeOffsets["yOffsets"] = numpy.array([offset[1] for offset in offsets], dtype=numpy.int64)
+            self.rangeOffsets[rangeKey] = rangeOffsets
+        return self.rangeOffsets[rangeKey]
+
+    def findCellRangePositions(self, cell, cellRange):
+        # Positions in a range view are keyed by offset from the viewing cell, as found by findCellOffset
+        return self.findCellRangeOffsets(cell, cellRange)["positions"]
+
+    def findCellsInRange(self, cell, cellRange):
+        # Cumulative views are built once per cell and range, then shared read-only by every caller
+        if cellRange not in cell.rangeViews:
+            if self.radialRanges == True:
+                cellsInRange = self.findRadialCellsInRange(cell, cellRange)
+            else:
+                cellsInRange = self.findCardinalCellsInRange(cell, cellRange)
+            cell.rangeViews[cellRange] = types.MappingProxyType(cellsInRange)
+        return cell.rangeViews[cellRange]
+
+    def findGeometry(self):
+        # Geometry refers to cells only by index, so environments sharing a geometry key can share it while each builds its own cells
+        neighborIndices = []
+        for i in range(self.width):
+            for j in range(self.height):
+                neighbors = self.grid[i][j].neighbors
+                neighborIndices.append([(direction, (neighbors[direction].x * self.height) + neighbors[direction].y) for direction in neighbors])
+        geometry = {"maxCellDistance": self.maxCellDistance, "maxDeltaX": self.maxDeltaX, "maxDeltaY": self.maxDeltaY, "neighborIndices": neighborIndices,
+                    "radialRanges": self.radialRanges, "rangeOffsets": self.rangeOffsets, "rangeStencil": self.rangeStencil,
+                    "xRangeWindows": self.xRangeWindows, "yRangeWindows": self.yRangeWindows}
+        if self.arrayGrid == True:
+            geometry["cellNeighborCounts"] = self.cellNeighborCounts.copy()
+            geometry["cellNeighborStencil"] = self.cellNeighborStencil
+        return geometry
+
+    def findGeometryKey(self):
+        # Cell neighbors and ranges are fully determined by these settings, so grids sharing a key can share them
+        config = self.sugarscape.configuration
+        radialRanges = config["agentVisionMode"] == "radial" and config["agentMovementMode"] == "radial"
+        return (self.width, self.height, self.wraparound, self.neighborhoodMode, radialRanges, self.findRangeLimits(), self.arrayGrid)
+
+    def findOccupancyTiles(self):
+        # Occupied cells are bucketed into tiles as wide as the maximum agent range so a range query touches few tiles
+        self.occupancyTileSize = max(1, self.maxCellDistance)
+        self.occupancyCountRange = 0
+        self.occupancyCounts = []
+        tileColumns = math.ceil(self.width / self.occupancyTileSize)
+        tileRows = math.ceil(self.height / self.occupancyTileSize)
+        self.occupancyTiles = [[set() for j in range(tileRows)] for i in range(tileColumns)]
+        self.xOccupancyTileWindows = self.findAxisTileWindows(self.maxDeltaX, self.width)
+        self.yOccupancyTileWindows = self.findAxisTileWindows(self.maxDeltaY, self.height)
+        for i in range(self.width):
+            for j in range(self.height):
+                if self.grid[i][j].agent != None:
+                    self.addOccupiedCell(self.grid[i][j])
+
+    def findOccupiedCellCount(self, cell, cellRange):
+        # Counts are built up to the widest range queried so far and kept up to date as agents enter and leave cells
+        if cellRange <= 0:
+            return 0
+        if cellRange > self.occupancyCountRange:
+            self.createOccupancyCounts(cellRange)
+        if self.arrayGrid == True:
+            return int(self.occupancyCounts[1:cellRange + 1, cell.index].sum())
+        position = cell.x * self.height + cell.y
+        return sum(self.occupancyCounts[gridRange][position] for gridRange in range(1, cellRange + 1))
+
+    def findOccupiedCellsInRange(self, cell, cellRange):
+        if cellRange <= 0:
+            return []
+        cellsInRange = self.findCellsInRange(cell, cellRange)
+        tiles = [self.occupancyTiles[i][j] for i in self.xOccupancyTileWindows[cell.x] for j in self.yOccupancyTileWindows[cell.y]]
+        # Scanning the range is cheaper than sorting tile contents when the neighborhood is crowded
+        if sum(len(tile) for tile in tiles) >= len(cellsInRange):
+            return [neighborCell for neighborCell in cellsInRange if neighborCell.agent != None]
+        occupiedCells = [neighborCell for tile in tiles for neighborCell in tile if neighborCell in cellsInRange]
+        # Keep occupied cells in the same order as the cells in range
+        rangePositions = self.findCellRangePositions(cell, cellRange)
+        occupiedCells.sort(key=lambda neighborCell: rangePositions[self.findCellOffset(cell, neighborCell)])
+        return occupiedCells
+
+    def findRadialCellsInRange(self, cell, cellRange):
+        rangeCells = [[] for gridRange in range(cellRange + 1)]
+        # Visiting the axis windows in ascending grid order keeps each range ordered by cell position
+        for x, deltaX in self.xRangeWindows[cell.x]:
+            if deltaX > cellRange:
+                continue
+            column = self.grid[x]
+            stencilColumn = self.rangeStencil[deltaX]
+            for y, deltaY in self.yRangeWindows[cell.y]:
+                if deltaY > cellRange:
+                    continue
+                stencilEntry = stencilColumn[deltaY]
+                if stencilEntry == None or stencilEntry[1] > cellRange:
+                    continue
+                rangeCells[stencilEntry[1]].append((column[y], stencilEntry[0]))
+        cellsInRange = {}
+        for gridRange in range(1, cellRange + 1):
+            for neighborCell, distance in rangeCells[gridRange]:
+                cellsInRange[neighborCell] = distance
+        return cellsInRange
+
+    def findRadialRangeStencil(self, maxDeltaX, maxDeltaY, maxDeltaRadius):
+        distanceTable = self.createDistanceTable(maxDeltaX, maxDeltaY)
+        self.xRangeWindows = self.findAxisCellWindows(maxDeltaX, self.width)
+        self.yRangeWindows = self.findAxisCellWindows(maxDeltaY, self.height)
+        # Stencil is indexed by [deltaX][deltaY] and holds the distance and range of that offset, shared by all cells
+        self.rangeStencil = [[None for deltaY in range(maxDeltaY + 1)] for deltaX in range(maxDeltaX + 1)]
+        for deltaX in range(maxDeltaX + 1):
+            for deltaY in range(maxDeltaY + 1):
+                if deltaX == 0 and deltaY == 0:
+                    continue
+                deltaPair = (deltaX, deltaY) if deltaX <= deltaY else (deltaY, deltaX)
+                distance = distanceTable[deltaPair]
+                gridRange = math.floor(distance)
+                if gridRange <= maxDeltaRadius:
+                    self.rangeStencil[deltaX][deltaY] = (distance, gridRange)
+
+    def findRangeLimits(self):
         config = self.sugarscape.configuration
         # Determine maximum range to memoize based on the maximum possible agent vision and movement from bonuses
         maxVision = config["startingDiseases"] * max(config["diseaseVisionPenalty"][1], 0) + config["agentVision"][1]
@@ -138,35 +512,7 @@ class Environment:
             maxDeltaX = min(maxAgentRange, self.width - 1)
             maxDeltaY = min(maxAgentRange, self.height - 1)
             maxRadialDelta = min(maxAgentRange, math.floor(math.sqrt((self.width - 1) ** 2 + (self.height - 1) ** 2)))
-        maxCardinalDelta = max(maxDeltaX, maxDeltaY)
-        self.maxCellDistance = maxRadialDelta if config["agentVisionMode"] == "radial" and config["agentMovementMode"] == "radial" else maxCardinalDelta
-        cellCoords = [(x, y) for x in range(self.width) for y in range(self.height)]
-        # Initialize ranges with all possible values
-        for x, y in cellCoords:
-            self.grid[x][y].ranges = {gridRange: {} for gridRange in range(1, self.maxCellDistance + 1)}
-
-        if config["agentVisionMode"] == "radial" and config["agentMovementMode"] == "radial":
-            self.findRadialCellRanges(maxDeltaX, maxDeltaY, maxRadialDelta, cellCoords)
-        else:
-            self.findCardinalCellRanges(maxDeltaX, maxDeltaY, cellCoords)
-
-    def findRadialCellRanges(self, maxDeltaX, maxDeltaY, maxDeltaRadius, cellCoords):
-        distanceTable = self.createDistanceTable(maxDeltaX, maxDeltaY)
-        numCells = self.width * self.height
-        for i in range(numCells):
-            x1, y1 = cellCoords[i]
-            for j in range(i + 1, numCells):
-                x2, y2 = cellCoords[j]
-                deltaX = self.findWraparoundDistance(x1 - x2, self.width)
-                deltaY = self.findWraparoundDistance(y1 - y2, self.height)
-                if deltaX > maxDeltaX or deltaY > maxDeltaY:
-                    continue
-                deltaPair = tuple(sorted((deltaX, deltaY)))
-                distance = distanceTable[deltaPair]
-                gridRange = math.floor(distance)
-                if gridRange <= maxDeltaRadius:
-                    self.grid[x1][y1].ranges[gridRange][self.grid[x2][y2]] = distance
-                    self.grid[x2][y2].ranges[gridRange][self.grid[x1][y1]] = distance
+        return (maxDeltaX, maxDeltaY, maxRadialDelta)
 
     def findWraparoundDistance(self, delta, border):
         delta = abs(delta)
@@ -174,6 +520,14 @@ class Environment:
             delta = border - delta
         return delta
 
+    def removeOccupiedCell(self, cell):
+        if self.occupancyTileSize == 0:
+            return
+        tile = self.occupancyTiles[cell.x // self.occupancyTileSize][cell.y // self.occupancyTileSize]
+        if cell in tile:
+            tile.remove(cell)
+            self.updateOccupancyCounts(cell, -1)
+
     def resetCell(self, x, y):
         self.grid[x][y] = None
 
@@ -185,6 +539,47 @@ class Environment:
                 cell.season = self.seasonSouth
             self.grid[x][y] = cell
 
+    def setGeometry(self, geometry):
+        for i in range(self.width):
+            for j in range(self.height):
+                neighborIndices = geometry["neighborIndices"][(i * self.height) + j]
+                self.grid[i][j].neighbors = {direction: self.findCellAtIndex(index) for direction, index in neighborIndices}
+        if self.arrayGrid == True:
+            self.cellNeighborCounts[:] = geometry["cellNeighborCounts"]
+            self.cellNeighborStencil = geometry["cellNeighborStencil"]
+        self.maxCellDistance = geometry["maxCellDistance"]
+        self.maxDeltaX = geometry["maxDeltaX"]
+        self.maxDeltaY = geometry["maxDeltaY"]
+        self.radialRanges = geometry["radialRanges"]
+        # Range offsets are filled in as ranges are first queried and are shared with every environment of this geometry
+        self.rangeOffsets = geometry["rangeOffsets"]
+        self.rangeStencil = geometry["rangeStencil"]
+        self.xRangeWindows = geometry["xRangeWindows"]
+        self.yRangeWindows = geometry["yRangeWindows"]
+        self.findOccupancyTiles()
+
+    def updateCellNeighborWealth(self, cell):
+        # Only the cells counting a harvested cell as a neighbor change
+        if len(self.cellNeighborWealth) == 0:
+            return
+        for reverseNeighbor in self.cellReverseNeighbors[cell]:
+            if self.arrayGrid == True:
+                self.cellNeighborWealth[reverseNeighbor.index] = reverseNeighbor.findNeighborWealth()
+            else:
+                self.cellNeighborWealth[reverseNeighbor.x * self.height + reverseNeighbor.y] = reverseNeighbor.findNeighborWealth()
+
+    def updateOccupancyCounts(self, cell, change):
+        if self.occupancyCountRange == 0:
+            return
+        # Each cell in range is counted at the smallest range band it appears in
+        if self.radialRanges == True and self.arrayGrid == True:
+            # Radial distances are unique per cell, so the band is the whole part of the distance
+            travelDistances, rangeIndices, rangeDistances = self.findCellRangeArrays(cell, self.occupancyCountRange)
+            self.occupancyCounts[numpy.floor(rangeDistances).astype(numpy.int64), rangeIndices] += change
+            return
+        for neighborCell, rangeBand in self.findCellRangeBands(cell, self.occupancyCountRange).items():
+            self.occupancyCounts[rangeBand][neighborCell.x * self.height + neighborCell.y] += change
+
     def updatePollution(self):
         if self.pollutionDiffusionStart <= self.timestep <= self.pollutionDiffusionEnd and self.pollutionDiffusionDelay > 0:
             self.pollutionDiffusionCountdown -= 1
@@ -2,11 +2,22 @@ import agent
 
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class Bentham(agent.Agent):
+    __slots__ = ()
+    # Below this many candidate cell and neighbor pairs, array setup costs more than the per-cell loop saves
+    minBatchedPairs = 1024
+
     def __init__(self, agentID, birthday, cell, configuration):
         super().__init__(agentID, birthday, cell, configuration)
 
-    def findEthicalValueOfCell(self, cell):
+    def findEthicalValueOfCell(self, cell, neighborTerms=None):
+        if neighborTerms == None:
+            neighborTerms = self.findNeighborTerms()
         happiness = 0
         unhappiness = 0
         cellSiteWealth = cell.sugar + cell.spice
@@ -17,34 +28,34 @@ class Bentham(agent.Agent):
             agentWealth = cell.agent.sugar + cell.agent.spice
             cellSiteWealth += min(agentWealth, globalMaxCombatLoot)
             cellMaxSiteWealth += min(agentWealth, globalMaxCombatLoot)
-        cellNeighborWealth = cell.findNeighborWealth()
-        globalMaxWealth = cell.environment.globalMaxSugar + cell.environment.globalMaxSpice
+        cellNeighborWealth = cell.environment.findCellNeighborWealth(cell)
         cellValue = 0
-        neighborhoodSize = len(self.neighborhood)
-        futureNeighborhoodSize = len(self.findNeighborhood(cell))
-        for neighbor in self.neighborhood:
+        # Future neighborhood size is only needed to find future extent when looking ahead
+        futureNeighborhoodSize = self.findNeighborhoodSize(cell) if self.decisionModelLookaheadFactor != 0 else 0
+        for terms in neighborTerms:
+            neighbor = terms["neighbor"]
             certainty = 1 if neighbor.canReachCell(cell) == True else 0
             # Skip if agent cannot reach cell
             if certainty == 0:
                 continue
             # Timesteps to reach cell, currently 1 since agents only plan for the current timestep
             timestepDistance = 1
-            neighborMetabolism = neighbor.sugarMetabolism + neighbor.spiceMetabolism
+            neighborMetabolism = terms["metabolism"]
             # If agent does not have metabolism, set duration to seemingly infinite
             cellDuration = cellSiteWealth / neighborMetabolism if neighborMetabolism > 0 else 0
             proximity = 1 / timestepDistance
-            intensity = (1 / (1 + neighbor.findTimeToLive()) / (1 + cell.pollution))
+            # Time to live is only found for neighbors that can reach a candidate cell, as it updates the neighbor
+            if terms["lifeIntensity"] == None:
+                terms["lifeIntensity"] = 1 / (1 + neighbor.findTimeToLive())
+            intensity = (terms["lifeIntensity"] / (1 + cell.pollution))
             duration = cellDuration / cellMaxSiteWealth if cellMaxSiteWealth > 0 else 0
             # Agent discount, futureDuration, and futureIntensity implement Bentham's purity and fecundity
-            discount = neighbor.decisionModelLookaheadDiscount
+            discount = terms["discount"]
             futureDuration = (cellSiteWealth - neighborMetabolism) / neighborMetabolism if neighborMetabolism > 0 else cellSiteWealth
             futureDuration = futureDuration / cellMaxSiteWealth if cellMaxSiteWealth > 0 else 0
-            # Normalize future intensity by number of adjacent cells
-            cellNeighbors = len(neighbor.cell.neighbors)
-            futureIntensity = cellNeighborWealth / (globalMaxWealth * cellNeighbors)
-            # Normalize extent by total cells in range
-            cellsInRange = len(neighbor.cellsInRange)
-            extent = neighborhoodSize / cellsInRange if cellsInRange > 0 else 1
+            futureIntensity = cellNeighborWealth / terms["maxNeighborWealth"]
+            cellsInRange = terms["cellsInRange"]
+            extent = terms["extent"]
             futureExtent = futureNeighborhoodSize / cellsInRange if cellsInRange > 0 and self.decisionModelLookaheadFactor != 0 else 1
             neighborCellValue = 0
 
@@ -55,9 +66,9 @@ class Bentham(agent.Agent):
                 futureDuration = -1 * futureDuration
                 futureIntensity = -1 * futureIntensity
                 if self.decisionModelLookaheadFactor == 0:
-                    neighborCellValue = neighbor.decisionModelFactor * ((extent * certainty * proximity) * ((intensity + duration) + (discount * (futureIntensity + futureDuration))))
+                    neighborCellValue = terms["decisionModelFactor"] * ((extent * certainty * proximity) * ((intensity + duration) + (discount * (futureIntensity + futureDuration))))
                 else:
-                    neighborCellValue = neighbor.decisionModelFactor * ((certainty * proximity) * ((extent * (intensity + duration)) + (discount * (futureExtent * (futureIntensity + futureDuration)))))
+                    neighborCellValue = terms["decisionModelFactor"] * ((certainty * proximity) * ((extent * (intensity + duration)) + (discount * (futureExtent * (futureIntensity + futureDuration)))))
             # If move will kill this neighbor, consider this a penalty
             elif neighbor != self and cell == neighbor.cell and self.selfishnessFactor < 1:
                 if self.decisionModelLookaheadFactor == 0:
@@ -69,12 +80,12 @@ class Bentham(agent.Agent):
                     neighborCellValue = -1
             else:
                 if self.decisionModelLookaheadFactor == 0:
-                    neighborCellValue = neighbor.decisionModelFactor * ((extent * certainty * proximity) * ((intensity + duration) + (discount * (futureIntensity + futureDuration))))
+                    neighborCellValue = terms["decisionModelFactor"] * ((extent * certainty * proximity) * ((intensity + duration) + (discount * (futureIntensity + futureDuration))))
                 else:
-                    neighborCellValue = neighbor.decisionModelFactor * ((certainty * proximity) * ((extent * (intensity + duration)) + (discount * (futureExtent * (futureIntensity + futureDuration)))))
+                    neighborCellValue = terms["decisionModelFactor"] * ((certainty * proximity) * ((extent * (intensity + duration)) + (discount * (futureExtent * (futureIntensity + futureDuration)))))
 
             if self.decisionModelTribalFactor >= 0:
-                if neighbor.findTribe() == self.findTribe():
+                if terms["sameTribe"] == True:
                     neighborCellValue *= self.decisionModelTribalFactor
                 else:
                     neighborCellValue *= 1 - self.decisionModelTribalFactor
@@ -94,10 +105,159 @@ class Bentham(agent.Agent):
             return {"happiness": happiness, "unhappiness": unhappiness}
         return cellValue
 
+    def findEthicalValuesOfCells(self, cells):
+        # With no range, finding the neighborhood of a candidate cell clears the cells in range before any neighbor is valued
+        if self.findCellRange() <= 0:
+            self.findCellsInRange(cells[-1]["cell"])
+        if self.cell.environment.arrayGrid == True and len(cells) * len(self.neighborhood) >= self.minBatchedPairs:
+            return self.findEthicalValuesOfCellsArray(cells)
+        neighborTerms = self.findNeighborTerms()
+        return [self.findEthicalValueOfCell(cell["cell"], neighborTerms) for cell in cells]
+
+    def findEthicalValuesOfCellsArray(self, cells):
+        # Evaluates every candidate cell against every neighbor at once with the same operations as findEthicalValueOfCell
+        neighborTerms = self.findNeighborTerms()
+        candidates = [cell["cell"] for cell in cells]
+        environment = self.cell.environment
+        globalMaxCombatLoot = environment.maxCombatLoot * 2
+        candidateIndices = numpy.array([cell.index for cell in candidates], dtype=numpy.int64)
+        candidatePositions = {}
+        candidateLoot = numpy.zeros(len(candidates), dtype=numpy.float64)
+        cellNeighborWealth = []
+        futureNeighborhoodSize = []
+        for position, cell in enumerate(candidates):
+            candidatePositions[cell] = position
+            if cell.agent != None:
+                agentWealth = cell.agent.sugar + cell.agent.spice
+                candidateLoot[position] = min(agentWealth, globalMaxCombatLoot)
+            cellNeighborWealth.append(environment.findCellNeighborWealth(cell))
+            futureNeighborhoodSize.append(self.findNeighborhoodSize(cell) if self.decisionModelLookaheadFactor != 0 else 0)
+        cellSiteWealth = ((environment.cellSugar[candidateIndices] + environment.cellSpice[candidateIndices]) + candidateLoot)[:, None]
+        cellMaxSiteWealth = ((environment.cellMaxSugar[candidateIndices] + environment.cellMaxSpice[candidateIndices]) + candidateLoot)[:, None]
+        cellPollution = environment.cellPollution[candidateIndices][:, None]
+        cellNeighborWealth = numpy.array(cellNeighborWealth, dtype=numpy.float64)[:, None]
+        futureNeighborhoodSize = numpy.array(futureNeighborhoodSize, dtype=numpy.float64)[:, None]
+
+        # Rows are candidate cells and columns are neighbors, with each neighbor reaching its own cell and the cells in its range
+        gridPositions = numpy.full(environment.width * environment.height, -1, dtype=numpy.int64)
+        gridPositions[candidateIndices] = numpy.arange(len(candidates))
+        reachable = numpy.zeros((len(candidates), len(neighborTerms)), dtype=bool)
+        onCell = numpy.zeros((len(candidates), len(neighborTerms)), dtype=bool)
+        isSelf = []
+        onCellPositions = []
+        onCellColumns = []
+        rangeIndices = []
+        rangeColumns = []
+        rangeSizes = []
+        for column, terms in enumerate(neighborTerms):
+            neighbor = terms["neighbor"]
+            isSelf.append(neighbor == self)
+            if neighbor.cell in candidatePositions:
+                onCellPositions.append(candidatePositions[neighbor.cell])
+                onCellColumns.append(column)
+            if len(neighbor.cellsInRange) > 0:
+                neighborRangeIndices = environment.findCellRangeArrays(neighbor.rangeCell, neighbor.cellRange)[1]
+                rangeIndices.append(neighborRangeIndices)
+                rangeColumns.append(column)
+                rangeSizes.append(len(neighborRangeIndices))
+        onCell[onCellPositions, onCellColumns] = True
+        reachable[onCellPositions, onCellColumns] = True
+        if len(rangeIndices) > 0:
+            rangePositions = gridPositions[numpy.concatenate(rangeIndices)]
+            rangeColumns = numpy.repeat(rangeColumns, rangeSizes)
+            inCandidates = rangePositions >= 0
+            reachable[rangePositions[inCandidates], rangeColumns[inCandidates]] = True
+        isSelf = numpy.array(isSelf, dtype=bool)
+        # Time to live is only found for neighbors that can reach a candidate, as it updates the neighbor
+        for column, reachesCandidate in enumerate(reachable.any(axis=0).tolist()):
+            terms = neighborTerms[column]
+            if terms["lifeIntensity"] == None and reachesCandidate == True:
+                terms["lifeIntensity"] = 1 / (1 + terms["neighbor"].findTimeToLive())
+        neighborColumns = numpy.array([(terms["metabolism"], terms["lifeIntensity"] if terms["lifeIntensity"] != None else 0, terms["discount"], terms["decisionModelFactor"],
+                                        terms["maxNeighborWealth"], terms["cellsInRange"], terms["extent"]) for terms in neighborTerms], dtype=numpy.float64)
+        neighborMetabolism, lifeIntensity, discount, decisionModelFactor, maxNeighborWealth, cellsInRange, extent = neighborColumns.T
+        sameTribe = numpy.array([terms["sameTribe"] for terms in neighborTerms], dtype=bool)
+
+        # Placeholder divisors keep masked out divisions finite
+        hasMetabolism = neighborMetabolism > 0
+        metabolismDivisor = numpy.where(hasMetabolism, neighborMetabolism, 1)
+        hasMaxSiteWealth = cellMaxSiteWealth > 0
+        maxSiteWealthDivisor = numpy.where(hasMaxSiteWealth, cellMaxSiteWealth, 1)
+        hasCellsInRange = cellsInRange > 0
+        cellsInRangeDivisor = numpy.where(hasCellsInRange, cellsInRange, 1)
+
+        certainty = 1
+        timestepDistance = 1
+        cellDuration = numpy.where(hasMetabolism, cellSiteWealth / metabolismDivisor, 0)
+        proximity = 1 / timestepDistance
+        intensity = lifeIntensity / (1 + cellPollution)
+        duration = numpy.where(hasMaxSiteWealth, cellDuration / maxSiteWealthDivisor, 0)
+        futureDuration = numpy.where(hasMetabolism, (cellSiteWealth - neighborMetabolism) / metabolismDivisor, cellSiteWealth)
+        futureDuration = numpy.where(hasMaxSiteWealth, futureDuration / maxSiteWealthDivisor, 0)
+        futureIntensity = cellNeighborWealth / maxNeighborWealth
+        futureExtent = numpy.where(hasCellsInRange & (self.decisionModelLookaheadFactor != 0), futureNeighborhoodSize / cellsInRangeDivisor, 1)
+
+        # Opportunity costs negate each term, while lethal moves negate the whole value
+        opportunityCost = (isSelf == False) & (onCell == False) & (self.selfishnessFactor < 1)
+        lethalMove = (isSelf == False) & onCell & (self.selfishnessFactor < 1)
+        sign = numpy.where(opportunityCost, -1, 1)
+        duration = sign * duration
+        intensity = sign * intensity
+        futureDuration = sign * futureDuration
+        futureIntensity = sign * futureIntensity
+        if self.decisionModelLookaheadFactor == 0:
+            value = (extent * certainty * proximity) * ((intensity + duration) + (discount * (futureIntensity + futureDuration)))
+        else:
+            value = (certainty * proximity) * ((extent * (intensity + duration)) + (discount * (futureExtent * (futureIntensity + futureDuration))))
+        neighborCellValue = numpy.where(lethalMove, -1 * value, decisionModelFactor * value)
+        # If penalty is too slight, make it more severe
+        neighborCellValue = numpy.where(lethalMove & (neighborCellValue > -1), -1, neighborCellValue)
+
+        if self.decisionModelTribalFactor >= 0:
+            neighborCellValue = neighborCellValue * numpy.where(sameTribe, self.decisionModelTribalFactor, 1 - self.decisionModelTribalFactor)
+        if self.selfishnessFactor >= 0:
+            neighborCellValue = neighborCellValue * numpy.where(isSelf, self.selfishnessFactor, 1 - self.selfishnessFactor)
+        neighborCellValue = numpy.where(reachable, neighborCellValue, 0)
+
+        # Accumulating sums add neighbors in order, matching the rounding of the per-cell loop
+        if self.selfishnessFactor >= 0:
+            return numpy.cumsum(neighborCellValue, axis=1)[:, -1].tolist()
+        happiness = numpy.cumsum(numpy.where(neighborCellValue > 0, neighborCellValue, 0), axis=1)[:, -1].tolist()
+        unhappiness = numpy.cumsum(numpy.where(neighborCellValue > 0, 0, neighborCellValue), axis=1)[:, -1].tolist()
+        return [{"happiness": happiness[position], "unhappiness": unhappiness[position]} for position in range(len(candidates))]
+
+    def findNeighborTerms(self):
+        # Neighbor terms do not depend on the candidate cell, so they are found once per decision and shared by every candidate
+        environment = self.cell.environment
+        globalMaxWealth = environment.globalMaxSugar + environment.globalMaxSpice
+        neighborhoodSize = len(self.neighborhood)
+        tribe = self.findTribe() if self.decisionModelTribalFactor >= 0 else None
+        neighborTerms = []
+        for neighbor in self.neighborhood:
+            # Normalize future intensity by number of adjacent cells
+            cellNeighbors = len(neighbor.cell.neighbors)
+            # Normalize extent by total cells in range
+            cellsInRange = len(neighbor.cellsInRange)
+            neighborTerms.append({
+                "cellsInRange": cellsInRange,
+                "decisionModelFactor": neighbor.decisionModelFactor,
+                "discount": neighbor.decisionModelLookaheadDiscount,
+                "extent": neighborhoodSize / cellsInRange if cellsInRange > 0 else 1,
+                "lifeIntensity": None,
+                "maxNeighborWealth": globalMaxWealth * cellNeighbors,
+                "metabolism": neighbor.sugarMetabolism + neighbor.spiceMetabolism,
+                "neighbor": neighbor,
+                "sameTribe": self.decisionModelTribalFactor >= 0 and neighbor.findTribe() == tribe
+                })
+        return neighborTerms
+
     def spawnChild(self, childID, birthday, cell, configuration):
         return Bentham(childID, birthday, cell, configuration)
 
 class ReactiveBentham(Bentham):
+    # Time to live is kept in a slot of every agent so agents can switch to this decision model in place
+    __slots__ = ()
+
     def __init__(self, agentID, birthday, cell, configuration):
         super().__init__(agentID, birthday, cell, configuration)
         self.lastTimeToLive = 0
@@ -113,6 +273,8 @@ class ReactiveBentham(Bentham):
         self.lastTimeToLive = self.timeToLive
 
 class Leader(agent.Agent):
+    __slots__ = ("agentPlacements", "grid")
+
     def __init__(self, agentID, birthday, cell, configuration):
         super().__init__(agentID, birthday, cell, configuration)
         # Special leader agent should be configured to be immortal and omniscient
@@ -171,3 +333,9 @@ class Leader(agent.Agent):
 
     def spawnChild(self, childID, birthday, cell, configuration):
         return Leader(childID, birthday, cell, configuration)
+
+class ArrayBentham(agent.ArrayAgent, Bentham):
+    __slots__ = ()
+
+class ArrayReactiveBentham(agent.ArrayAgent, ReactiveBentham):
+    __slots__ = ()
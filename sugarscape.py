@@ -1,21 +1,35 @@
 #! /usr/bin/python
 
 import agent
+import agentstore
 import cell
+import checkpoint
 import condition
 import environment
 import ethics
+import timing
 
 import getopt
+import gzip
 import hashlib
+import io
 import json
 import math
+import os
 import random
 import re
 import sys
+import traceback
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 class Sugarscape:
-    def __init__(self, configuration):
+    def __init__(self, configuration, geometryCache=None, randomGenerator=None):
+        # Simulations draw only from their own random number generator so several can run side by side in one process
+        self.random = randomGenerator if randomGenerator != None else random.Random(configuration["seed"])
         self.agentConfigHashes = None
         self.diseaseConfigHashes = None
         self.configuration = configuration
@@ -23,7 +37,8 @@ class Sugarscape:
         self.timestep = 0
         self.nextAgentID = 0
         self.nextDiseaseID = 0
-        environmentConfiguration = {"equator": configuration["environmentEquator"],
+        environmentConfiguration = {"arrayGrid": configuration["environmentArrayGrid"],
+                                    "equator": configuration["environmentEquator"],
                                     "globalMaxSpice": configuration["environmentMaxSpice"],
                                     "globalMaxSugar": configuration["environmentMaxSugar"],
                                     "maxCombatLoot": configuration["environmentMaxCombatLoot"],
@@ -47,10 +62,11 @@ class Sugarscape:
         self.environment = environment.Environment(configuration["environmentHeight"], configuration["environmentWidth"], self, environmentConfiguration)
         self.environmentHeight = configuration["environmentHeight"]
         self.environmentWidth = configuration["environmentWidth"]
-        self.configureEnvironment(configuration["environmentMaxSugar"], configuration["environmentMaxSpice"], configuration["environmentSugarPeaks"], configuration["environmentSpicePeaks"])
+        self.configureEnvironment(configuration["environmentMaxSugar"], configuration["environmentMaxSpice"], configuration["environmentSugarPeaks"], configuration["environmentSpicePeaks"], geometryCache)
         self.debug = configuration["debugMode"]
         self.keepAlive = configuration["keepAlivePostExtinction"]
         self.agents = []
+        self.agentsByID = {}
         self.replacedAgents = []
         self.bornAgents = []
         self.deadAgents = []
@@ -58,6 +74,7 @@ class Sugarscape:
         self.diseases = []
         self.remainingDiseases = []
         self.agentLeader = None
+        self.agentStore = agentstore.AgentStore(self.environment) if configuration["agentArrayStore"] == True else None
         self.activeQuadrants = self.findActiveQuadrants()
         self.configureDepression()
         self.configureAgents(configuration["startingAgents"])
@@ -65,6 +82,7 @@ class Sugarscape:
         self.gui = gui.GUI(self, self.configuration["interfaceHeight"], self.configuration["interfaceWidth"]) if configuration["headlessMode"] == False else None
         self.run = False # Simulation start flag
         self.end = False # Simulation end flag
+        self.started = False # Simulation log start flag
         # TODO: Remove redundant metrics
         # TODO: Streamline naming
         self.runtimeStats = {"timestep": 0, "population": 0, "meanMetabolism": 0, "meanMovement": 0, "meanVision": 0, "meanWealth": 0, "meanAge": 0, "giniCoefficient": 0,
@@ -79,34 +97,32 @@ class Sugarscape:
                              }
         self.graphStats = {"ageBins": [], "sugarBins": [], "spiceBins": [], "lorenzCurvePoints": [], "meanTribeTags": [],
                            "maxSugar": 0, "maxSpice": 0, "maxWealth": 0}
+        self.runtimeStatsHistory = []
+        self.checkpointFile = configuration["checkpointFile"]
+        self.checkpointInterval = configuration["checkpointInterval"]
         self.log = open(configuration["logfile"], 'a') if configuration["logfile"] != None else None
         self.logFormat = configuration["logfileFormat"]
-        self.experimentalGroup = configuration["experimentalGroup"]
-        if self.experimentalGroup != None:
-            # Convert keys to Pythonic case scheme and initialize values
-            groupRuntimeStats = {}
-            for key in self.runtimeStats.keys():
-                controlGroupKey = "control" + key[0].upper() + key[1:]
-                experimentalGroupKey = self.experimentalGroup + key[0].upper() + key[1:]
-                groupRuntimeStats[controlGroupKey] = 0
-                groupRuntimeStats[experimentalGroupKey] = 0
-            self.runtimeStats.update(groupRuntimeStats)
-            self.groupInteractionRuntimeStats = {"combatControlGroupToControlGroup": 0, "combatControlGroupToExperimentalGroup": 0,
-                                                 "combatExperimentalGroupToControlGroup": 0, "combatExperimentalGroupToExperimentalGroup": 0,
-                                                 "diseaseControlGroupToControlGroup": 0, "diseaseControlGroupToExperimentalGroup": 0,
-                                                 "diseaseExperimentalGroupToControlGroup": 0, "diseaseExperimentalGroupToExperimentalGroup": 0,
-                                                 "lendingControlGroupToControlGroup": 0, "lendingControlGroupToExperimentalGroup": 0,
-                                                 "lendingExperimentalGroupToControlGroup": 0, "lendingExperimentalGroupToExperimentalGroup": 0,
-                                                 "reproductionControlGroupToControlGroup": 0, "reproductionControlGroupToExperimentalGroup": 0,
-                                                 "reproductionExperimentalGroupToControlGroup": 0, "reproductionExperimentalGroupToExperimentalGroup": 0,
-                                                 "tradeControlGroupToControlGroup": 0, "tradeControlGroupToExperimentalGroup": 0,
-                                                 "tradeExperimentalGroupToControlGroup": 0, "tradeExperimentalGroupToExperimentalGroup": 0
-                                                 }
-            self.runtimeStats.update(self.groupInteractionRuntimeStats)
+        self.timer = timing.PhaseTimer() if configuration["timingMode"] != "none" else None
+        self.timingMode = configuration["timingMode"]
+        if self.timingMode == "log":
+            self.updateTimingStats()
+        self.experimentalGroup = None
+        self.groupRuntimeStats = {}
+        # Forks continue the warm-up log, so it has columns for the experimental group of every fork
+        for forkConfiguration in configuration["forkConfigurations"]:
+            if "experimentalGroup" in forkConfiguration and forkConfiguration["experimentalGroup"] != None:
+                self.configureExperimentalGroup(forkConfiguration["experimentalGroup"])
+        self.configureExperimentalGroup(configuration["experimentalGroup"])
+        self.forkConfigurations = configuration["forkConfigurations"]
+        self.forkLogPosition = None
+        self.forkTimestep = configuration["forkTimestep"]
 
     def addAgent(self, agent):
+        if self.agentStore != None:
+            self.agentStore.addAgent(agent)
         self.bornAgents.append(agent)
         self.agents.append(agent)
+        self.agentsByID[agent.ID] = agent
 
     def addRemainingDiseases(self):
         infectedDiseases = []
@@ -140,6 +156,37 @@ class Sugarscape:
                     self.environment.findCell(i, j).maxSugar = cellMaxCapacity
                     self.environment.findCell(i, j).sugar = cellMaxCapacity
 
+    def changeAgentDecisionModel(self, a, decisionModel):
+        # Decision model classes share one attribute layout, so a living agent takes on another decision model in place and keeps its state
+        decisionModelClass = self.findDecisionModelClass(decisionModel)
+        if decisionModelClass == ethics.ReactiveBentham and isinstance(a, ethics.ReactiveBentham) == False:
+            a.lastTimeToLive = 0
+        if a.agentStore != None:
+            decisionModelClass = a.agentStore.findArrayClass(decisionModelClass)
+        a.__class__ = decisionModelClass
+        a.decisionModel = decisionModel
+        a.decisionModelLookaheadFactor = self.configuration["agentDecisionModelLookaheadFactor"]
+        self.configureAgentDecisionModel(a, decisionModel, a.selfishnessFactor)
+
+    def configureAgentDecisionModel(self, a, decisionModel, selfishnessFactor):
+        if "altruist" in decisionModel:
+            a.selfishnessFactor = 0
+        elif "bentham" in decisionModel:
+            if selfishnessFactor < 0:
+                a.selfishnessFactor = 0.5
+        elif "egoist" in decisionModel:
+            a.selfishnessFactor = 1
+        elif "negativeBentham" in decisionModel:
+            a.selfishnessFactor = -1
+        elif "reactiveBentham" in decisionModel:
+            if selfishnessFactor < 0:
+                a.selfishnessFactor = 0.5
+
+        if "NoLookahead" in decisionModel:
+            a.decisionModelLookaheadFactor = 0
+        elif "HalfLookahead" in decisionModel:
+            a.decisionModelLookaheadFactor = 0.5
+
     def configureAgents(self, numAgents):
         if self.environment == None:
             return
@@ -160,9 +207,9 @@ class Sugarscape:
         # Ensure agent endowments are randomized across initial agent count to make replacements follow same distributions
         agentEndowments = self.randomizeAgentEndowments(numAgents)
         for quadrant in emptyCells:
-            random.shuffle(quadrant)
+            self.random.shuffle(quadrant)
         quadrantIndices = [i for i in range(quadrants)]
-        random.shuffle(quadrantIndices)
+        self.random.shuffle(quadrantIndices)
 
         for i in range(numAgents):
             quadrantIndex = quadrantIndices[i % quadrants]
@@ -176,35 +223,20 @@ class Sugarscape:
                 a.gotoCell(cornerCell)
                 self.agentLeader = a
             # If using a different decision model, replace new agent with instance of child class
-            if "altruist" in agentConfiguration["decisionModel"]:
-                a = ethics.Bentham(agentID, self.timestep, randomCell, agentConfiguration)
-                a.selfishnessFactor = 0
-            elif "bentham" in agentConfiguration["decisionModel"]:
-                a = ethics.Bentham(agentID, self.timestep, randomCell, agentConfiguration)
-                if agentConfiguration["selfishnessFactor"] < 0:
-                    a.selfishnessFactor = 0.5
-            elif "egoist" in agentConfiguration["decisionModel"]:
-                a = ethics.Bentham(agentID, self.timestep, randomCell, agentConfiguration)
-                a.selfishnessFactor = 1
-            elif "negativeBentham" in agentConfiguration["decisionModel"]:
-                a = ethics.Bentham(agentID, self.timestep, randomCell, agentConfiguration)
-                a.selfishnessFactor = -1
-            elif "reactiveBentham" in agentConfiguration["decisionModel"]:
-                a = ethics.ReactiveBentham(agentID, self.timestep, randomCell, agentConfiguration)
-                if agentConfiguration["selfishnessFactor"] < 0:
-                    a.selfishnessFactor = 0.5
-
-            if "NoLookahead" in agentConfiguration["decisionModel"]:
-                a.decisionModelLookaheadFactor = 0
-            elif "HalfLookahead" in agentConfiguration["decisionModel"]:
-                a.decisionModelLookaheadFactor = 0.5
+            decisionModelClass = self.findDecisionModelClass(agentConfiguration["decisionModel"])
+            if decisionModelClass != agent.Agent:
+                a = decisionModelClass(agentID, self.timestep, randomCell, agentConfiguration)
+            self.configureAgentDecisionModel(a, agentConfiguration["decisionModel"], agentConfiguration["selfishnessFactor"])
             if self.configuration["environmentTribePerQuadrant"] == True:
                 tribe = quadrantIndex
                 tags = self.generateTribeTags(tribe)
-                a.tags = tags
+                a.setTags(tags)
                 a.tribe = a.findTribe()
-            randomCell.agent = a
+            if self.agentStore != None:
+                self.agentStore.addAgent(a)
+            randomCell.setAgent(a)
             self.agents.append(a)
+            self.agentsByID[a.ID] = a
             if self.timestep > 0:
                 self.replacedAgents.append(a)
 
@@ -235,7 +267,7 @@ class Sugarscape:
                 numDiseases -= 1
 
         diseaseEndowments = self.randomizeDiseaseEndowments(numDiseases)
-        random.shuffle(self.agents)
+        self.random.shuffle(self.agents)
         initialDiseases = []
         for i in range(numDiseases):
             diseaseID = self.generateDiseaseID()
@@ -252,7 +284,7 @@ class Sugarscape:
         currStartingDiseases = minStartingDiseases
         initialDiseases.extend(premadeDiseases)
         for agent in self.agents:
-            random.shuffle(initialDiseases)
+            self.random.shuffle(initialDiseases)
             for newDisease in initialDiseases:
                 if len(agent.diseases) >= currStartingDiseases and startingDiseases != [0, 0]:
                     currStartingDiseases += 1
@@ -272,12 +304,15 @@ class Sugarscape:
         if startingDiseases == [0, 0] and len(initialDiseases) > 0 and ("all" in self.debug or "sugarscape" in self.debug):
             print(f"Could not place {len(diseases)} diseases.")
 
-    def configureEnvironment(self, maxSugar, maxSpice, sugarPeaks, spicePeaks):
+    def configureEnvironment(self, maxSugar, maxSpice, sugarPeaks, spicePeaks, geometryCache=None):
         height = self.environment.height
         width = self.environment.width
         for i in range(width):
             for j in range(height):
-                newCell = cell.Cell(i, j, self.environment)
+                if self.environment.arrayGrid == True:
+                    newCell = cell.ArrayCell(i, j, self.environment)
+                else:
+                    newCell = cell.Cell(i, j, self.environment)
                 self.environment.setCell(newCell, i, j)
 
         sugarRadiusScale = 2
@@ -289,8 +324,105 @@ class Sugarscape:
         radius = math.ceil(math.sqrt(spiceRadiusScale * (height + width)))
         for peak in spicePeaks:
             self.addResourcePeak(peak[0], peak[1], radius, peak[2], "spice")
-        self.environment.findCellNeighbors()
-        self.environment.findCellRanges()
+        # Environments with the same geometry share neighbor indices and range offsets, while each always has cells of its own
+        geometryKey = self.environment.findGeometryKey()
+        if geometryCache != None and geometryKey in geometryCache:
+            self.environment.setGeometry(geometryCache[geometryKey])
+        else:
+            self.environment.findCellNeighbors()
+            self.environment.findCellRanges()
+            if geometryCache != None:
+                geometryCache[geometryKey] = self.environment.findGeometry()
+
+    def configureExperimentalGroup(self, experimentalGroup):
+        # Clear statistics kept for any previous experimental group but keep their columns in the log
+        for key in self.groupRuntimeStats:
+            self.runtimeStats[key] = 0
+        self.experimentalGroup = experimentalGroup
+        if self.experimentalGroup != None:
+            # Convert keys to Pythonic case scheme and initialize values
+            groupRuntimeStats = {}
+            for key in self.runtimeStats.keys():
+                # Phase times are measured for the whole simulation, not per group
+                if key in timing.timestepPhaseStats.values() or key in self.groupRuntimeStats:
+                    continue
+                controlGroupKey = "control" + key[0].upper() + key[1:]
+                experimentalGroupKey = self.experimentalGroup + key[0].upper() + key[1:]
+                groupRuntimeStats[controlGroupKey] = 0
+                groupRuntimeStats[experimentalGroupKey] = 0
+            self.groupRuntimeStats.update(groupRuntimeStats)
+            groupInteractionRuntimeStats = {"combatControlGroupToControlGroup": 0, "combatControlGroupToExperimentalGroup": 0,
+                                            "combatExperimentalGroupToControlGroup": 0, "combatExperimentalGroupToExperimentalGroup": 0,
+                                            "diseaseControlGroupToControlGroup": 0, "diseaseControlGroupToExperimentalGroup": 0,
+                                            "diseaseExperimentalGroupToControlGroup": 0, "diseaseExperimentalGroupToExperimentalGroup": 0,
+                                            "lendingControlGroupToControlGroup": 0, "lendingControlGroupToExperimentalGroup": 0,
+                                            "lendingExperimentalGroupToControlGroup": 0, "lendingExperimentalGroupToExperimentalGroup": 0,
+                                            "reproductionControlGroupToControlGroup": 0, "reproductionControlGroupToExperimentalGroup": 0,
+                                            "reproductionExperimentalGroupToControlGroup": 0, "reproductionExperimentalGroupToExperimentalGroup": 0,
+                                            "tradeControlGroupToControlGroup": 0, "tradeControlGroupToExperimentalGroup": 0,
+                                            "tradeExperimentalGroupToControlGroup": 0, "tradeExperimentalGroupToExperimentalGroup": 0
+                                            }
+            self.groupRuntimeStats.update(groupInteractionRuntimeStats)
+            self.runtimeStats.update(groupRuntimeStats)
+            self.runtimeStats.update(groupInteractionRuntimeStats)
+
+    def configureForkedSimulation(self, forkNumber, logPosition):
+        configuration = dict(self.configuration)
+        configuration.update(self.forkConfigurations[forkNumber])
+        # Continuations keep the log format of the warm-up they extend and never fork again
+        configuration["forkConfigurations"] = []
+        configuration["logfileFormat"] = self.logFormat
+        if "logfile" not in self.forkConfigurations[forkNumber] and configuration["logfile"] != None:
+            logRoot, logExtension = os.path.splitext(configuration["logfile"])
+            configuration["logfile"] = f"{logRoot}_fork{forkNumber}{logExtension}"
+        if "checkpointFile" not in self.forkConfigurations[forkNumber]:
+            configuration["checkpointFile"] = None
+        if "agentDecisionModels" in self.forkConfigurations[forkNumber]:
+            configuration["agentDecisionModel"] = None
+        configuration = verifyConfiguration(configuration)
+        warmupConfiguration = self.configuration
+        self.configuration = configuration
+        self.checkpointFile = configuration["checkpointFile"]
+        self.checkpointInterval = configuration["checkpointInterval"]
+        self.debug = configuration["debugMode"]
+        self.forkConfigurations = []
+        self.keepAlive = configuration["keepAlivePostExtinction"]
+        self.maxTimestep = configuration["timesteps"]
+        if configuration["experimentalGroup"] != self.experimentalGroup:
+            self.configureExperimentalGroup(configuration["experimentalGroup"])
+        if configuration["seed"] != warmupConfiguration["seed"]:
+            self.seed = configuration["seed"]
+            self.runtimeStats["seed"] = self.seed
+            self.random.seed(self.seed)
+        # Living agents take on the new decision models in turn, as new agents are given them
+        if configuration["agentDecisionModels"] != warmupConfiguration["agentDecisionModels"]:
+            decisionModels = ["none" if decisionModel == "rawSugarscape" else decisionModel for decisionModel in configuration["agentDecisionModels"]]
+            livingAgents = [a for a in self.agents if a != self.agentLeader]
+            for i in range(len(livingAgents)):
+                self.changeAgentDecisionModel(livingAgents[i], decisionModels[i % len(decisionModels)])
+        # Reschedule diseases not yet introduced and introduce any additional diseases
+        if configuration["diseaseTimeframe"] != warmupConfiguration["diseaseTimeframe"] and len(self.remainingDiseases) > 0:
+            diseaseEndowments = self.randomizeDiseaseEndowments(len(self.remainingDiseases))
+            for i in range(len(self.remainingDiseases)):
+                self.remainingDiseases[i].startTimestep = diseaseEndowments[i]["startTimestep"]
+        if configuration["startingDiseases"] > warmupConfiguration["startingDiseases"]:
+            self.configureDiseases(configuration["startingDiseases"] - warmupConfiguration["startingDiseases"], configuration["diseaseList"])
+
+        # Each continuation log starts with a copy of the warm-up log
+        self.log = None
+        if configuration["logfile"] != None:
+            warmupLog = None
+            if logPosition != None:
+                warmupLogFile = open(warmupConfiguration["logfile"], 'rb')
+                warmupLog = warmupLogFile.read(logPosition)
+                warmupLogFile.close()
+            logFile = open(configuration["logfile"], 'wb')
+            if warmupLog != None:
+                logFile.write(warmupLog)
+            logFile.close()
+            self.log = open(configuration["logfile"], 'a')
+            if warmupLog == None:
+                self.startLog()
 
     def doTimestep(self):
         if self.timestep >= self.maxTimestep:
@@ -302,24 +434,54 @@ class Sugarscape:
         if self.end == True or (len(self.agents) == 0 and self.keepAlive == False):
             self.toggleEnd()
         else:
+            timer = self.timer
+            if timer != None:
+                timer.startTimestep()
             self.environment.doTimestep(self.timestep)
-            random.shuffle(self.agents)
+            self.random.shuffle(self.agents)
+            if timer != None:
+                timer.lap("environment")
             self.addRemainingDiseases()
+            if timer != None:
+                timer.lap("diseaseIntroduction")
             if self.agentLeader != None:
-                self.agentLeader.doTimestep(self.timestep)
+                self.agentLeader.doTimestep(self.timestep, timer)
             for agent in self.agents:
                 if self.agentLeader != None and agent == self.agentLeader:
                     continue
-                agent.doTimestep(self.timestep)
+                agent.doTimestep(self.timestep, timer)
+            if timer != None:
+                timer.lap("agentOverhead")
+            if self.agentStore != None:
+                self.agentStore.doTimestep(self.agents, self.timestep, timer)
             self.removeDeadAgents()
+            if timer != None:
+                timer.lap("deadAgentRemoval")
             self.replaceDeadAgents()
+            if timer != None:
+                timer.lap("agentReplacement")
             self.updateRuntimeStats()
+            if timer != None:
+                timer.lap("runtimeStats")
             if self.gui != None:
                 self.updateGraphStats()
                 self.gui.doTimestep()
+            if timer != None:
+                timer.lap("gui")
+                if self.timingMode == "log":
+                    self.updateTimingStats()
+            # Mark where the fork timestep starts so the warm-up log can be ended there
+            if self.timestep == self.forkTimestep and len(self.forkConfigurations) > 0 and self.log != None:
+                self.log.flush()
+                self.forkLogPosition = self.log.tell()
             # If final timestep, do not write to log to cleanly close JSON array log structure
             if self.timestep != self.maxTimestep and len(self.agents) > 0:
                 self.writeToLog()
+                if self.checkpointInterval > 0 and self.timestep % self.checkpointInterval == 0:
+                    self.saveCheckpoint()
+            if timer != None:
+                timer.lap("logging")
+                timer.endTimestep()
 
     def endLog(self):
         if self.log == None:
@@ -346,13 +508,20 @@ class Sugarscape:
         self.log.write(logString)
         self.log.flush()
         self.log.close()
+        self.log = None
 
     def endSimulation(self):
+        # Ended simulations have closed their log and cannot be stepped again
+        self.toggleEnd()
         self.removeDeadAgents()
         self.endLog()
+        # Checkpoints of a finished simulation are no longer needed to resume it
+        if self.checkpointInterval > 0 and os.path.exists(self.checkpointFile):
+            os.remove(self.checkpointFile)
         if "all" in self.debug or "sugarscape" in self.debug:
             print(str(self))
-        exit(0)
+        if self.timer != None:
+            print(self.timer.findSummary())
 
     def findActiveQuadrants(self):
         quadrants = self.configuration["environmentStartingQuadrants"]
@@ -378,6 +547,68 @@ class Sugarscape:
             cellRange.append(quadrantFour)
         return cellRange
 
+    def findAgentByID(self, agentID):
+        if agentID in self.agentsByID:
+            return self.agentsByID[agentID]
+        return None
+
+    def findDecisionModelClass(self, decisionModel):
+        if "altruist" in decisionModel or "bentham" in decisionModel or "egoist" in decisionModel or "negativeBentham" in decisionModel:
+            return ethics.Bentham
+        elif "reactiveBentham" in decisionModel:
+            return ethics.ReactiveBentham
+        return agent.Agent
+
+    def findRuntimeStatsArrays(self):
+        # Statistics recorded by stepSimulation, as one array per statistic ordered by timestep
+        runtimeStatsArrays = {}
+        for stat in self.runtimeStats:
+            values = [runtimeStats.get(stat) for runtimeStats in self.runtimeStatsHistory]
+            runtimeStatsArrays[stat] = numpy.array(values) if numpy != None else values
+        return runtimeStatsArrays
+
+    def forkSimulations(self):
+        logPosition = None
+        if self.log != None:
+            self.log.flush()
+            logPosition = self.log.tell()
+        failedSimulations = 0
+        if hasattr(os, "fork") == False:
+            # Without process forking, each continuation is restored in turn from an in-memory snapshot
+            snapshot = io.BytesIO()
+            self.writeCheckpoint(snapshot, logPosition)
+            for forkNumber in range(len(self.forkConfigurations)):
+                snapshot.seek(0)
+                S = readCheckpoint(snapshot)[0]
+                if S.runForkedSimulation(forkNumber, logPosition) != 0:
+                    failedSimulations += 1
+        else:
+            forkedSimulations = []
+            for forkNumber in range(len(self.forkConfigurations)):
+                # Run at most one continuation per processor at a time
+                if len(forkedSimulations) >= os.cpu_count():
+                    processID, status = os.wait()
+                    forkedSimulations.remove(processID)
+                    if os.waitstatus_to_exitcode(status) != 0:
+                        failedSimulations += 1
+                processID = os.fork()
+                if processID == 0:
+                    os._exit(self.runForkedSimulation(forkNumber, logPosition))
+                forkedSimulations.append(processID)
+            for processID in forkedSimulations:
+                status = os.waitpid(processID, 0)[1]
+                if os.waitstatus_to_exitcode(status) != 0:
+                    failedSimulations += 1
+        if failedSimulations > 0:
+            print(f"{failedSimulations} of {len(self.forkConfigurations)} forked simulations failed.")
+        # The warm-up log is kept as configured and ended as if the warm-up stopped at the fork, while the warm-up checkpoint is no longer needed once every continuation has run
+        if self.log != None:
+            self.log.truncate(self.forkLogPosition)
+            self.endLog()
+        if self.checkpointInterval > 0 and os.path.exists(self.checkpointFile):
+            os.remove(self.checkpointFile)
+        return 1 if failedSimulations > 0 else 0
+
     def generateAgentID(self):
         agentID = self.nextAgentID
         self.nextAgentID += 1
@@ -393,7 +624,7 @@ class Sugarscape:
             currTribe = i % numTribes
             tags = self.generateTribeTags(currTribe)
             tagsEndowments.append(tags)
-        random.shuffle(tagsEndowments)
+        self.random.shuffle(tagsEndowments)
         return tagsEndowments
 
     def generateDiseaseID(self):
@@ -408,10 +639,10 @@ class Sugarscape:
         minZeroes = math.floor(tribe * tribeSize)
         maxZeroes = math.floor((tribe + 1) * tribeSize) - 1
         maxZeroes = min(maxZeroes, tagStringLength)
-        zeroes = random.randint(minZeroes, maxZeroes)
+        zeroes = self.random.randint(minZeroes, maxZeroes)
         ones = tagStringLength - zeroes
         tags = [0 for i in range(zeroes)] + [1 for i in range(ones)]
-        random.shuffle(tags)
+        self.random.shuffle(tags)
         return tags
 
     def isDiseaseExperimentalGroup(self, diseaseID):
@@ -428,7 +659,7 @@ class Sugarscape:
             if self.gui != None and self.end == False:
                 self.gui.window.update()
             if self.end == True:
-                self.endSimulation()
+                return
 
     def randomizeAgentEndowments(self, numAgents):
         configs = self.configuration
@@ -463,6 +694,7 @@ class Sugarscape:
         sugarMetabolism = configs["agentSugarMetabolism"]
         tagPreferences = configs["agentTagPreferences"]
         tagging = configs["agentTagging"]
+        tradeBisection = configs["agentTradeBisection"]
         tradeFactor = configs["agentTradeFactor"]
         tagging = configs["agentTagging"]
         universalSpice = configs["agentUniversalSpice"]
@@ -472,7 +704,7 @@ class Sugarscape:
 
         numDepressedAgents = int(math.ceil(numAgents * configs["agentDepressionPercentage"]))
         depressionFactors = [1 for i in range(numDepressedAgents)] + [0 for i in range(numAgents - numDepressedAgents)]
-        random.shuffle(depressionFactors)
+        self.random.shuffle(depressionFactors)
 
         configurations = {"aggressionFactor": {"endowments": [], "curr": aggressionFactor[0], "min": aggressionFactor[0], "max": aggressionFactor[1]},
                           "baseInterestRate": {"endowments": [], "curr": baseInterestRate[0], "min": baseInterestRate[0], "max": baseInterestRate[1]},
@@ -548,7 +780,7 @@ class Sugarscape:
                     config["curr"] = config["min"]
 
             if immuneSystemLength > 0:
-                immuneSystems.append([random.randrange(2) for i in range(immuneSystemLength)])
+                immuneSystems.append([self.random.randrange(2) for i in range(immuneSystemLength)])
             else:
                 immuneSystems.append(None)
 
@@ -567,16 +799,16 @@ class Sugarscape:
             decisionModels.append(decisionModel)
 
         # Keep state of random numbers to allow extending agent endowments without altering original random object state
-        randomNumberReset = random.getstate()
+        randomNumberReset = self.random.getstate()
         for config in configurations:
-            random.seed(self.agentConfigHashes[config] + self.timestep)
-            random.shuffle(configurations[config]["endowments"])
-        random.setstate(randomNumberReset)
-        random.shuffle(sexes)
-        random.shuffle(decisionModels)
+            self.random.seed(self.agentConfigHashes[config] + self.timestep)
+            self.random.shuffle(configurations[config]["endowments"])
+        self.random.setstate(randomNumberReset)
+        self.random.shuffle(sexes)
+        self.random.shuffle(decisionModels)
         for i in range(numAgents):
             agentEndowment = {"seed": self.seed, "sex": sexes[i], "tags": tags.pop(), "tagPreferences": tagPreferences, "tagging": tagging,
-                              "immuneSystem": immuneSystems.pop(), "inheritancePolicy": inheritancePolicy,
+                              "immuneSystem": immuneSystems.pop(), "inheritancePolicy": inheritancePolicy, "tradeBisection": tradeBisection,
                               "decisionModel": decisionModels.pop(), "decisionModelLookaheadFactor": decisionModelLookaheadFactor,
                               "movementMode": movementMode, "neighborhoodMode": neighborhoodMode, "visionMode": visionMode,
                               "depressionFactor": depressionFactors[i], "follower": follower}
@@ -662,7 +894,7 @@ class Sugarscape:
             for config in configurations.keys():
                 if config == "tagLength":
                     tagLength = configurations[config]["curr"]
-                    tags.append([random.randrange(2) for i in range(tagLength)])
+                    tags.append([self.random.randrange(2) for i in range(tagLength)])
                 config = configurations[config]
                 config["endowments"].append(config["curr"])
                 config["curr"] += config["inc"]
@@ -671,12 +903,12 @@ class Sugarscape:
                     config["curr"] = config["min"]
 
         # Keep state of random numbers to allow extending agent endowments without altering original random object state
-        randomNumberReset = random.getstate()
+        randomNumberReset = self.random.getstate()
         for config in configurations:
-            random.seed(self.diseaseConfigHashes[config] + self.timestep)
-            random.shuffle(configurations[config]["endowments"])
-        random.setstate(randomNumberReset)
-        random.shuffle(tags)
+            self.random.seed(self.diseaseConfigHashes[config] + self.timestep)
+            self.random.shuffle(configurations[config]["endowments"])
+        self.random.setstate(randomNumberReset)
+        self.random.shuffle(tags)
 
         for i in range(numDiseases):
             diseaseEndowment = {"tags": tags.pop()}
@@ -695,7 +927,10 @@ class Sugarscape:
         self.deadAgents += deadAgents
         for agent in deadAgents:
             agent.doDeath()
-            self.agents.remove(agent)
+            del self.agentsByID[agent.ID]
+        # Filter living agents in a single pass, keeping their order so the next shuffle is reproducible
+        if len(deadAgents) > 0:
+            self.agents[:] = [agent for agent in self.agents if agent.ID in self.agentsByID]
 
     def replaceDeadAgents(self):
         numAgents = len(self.agents)
@@ -704,9 +939,7 @@ class Sugarscape:
             self.configureAgents(numReplacements)
 
     def runSimulation(self, timesteps=5):
-        self.startLog()
-        if self.log == None:
-            self.updateRuntimeStats()
+        self.startSimulation()
         if self.gui != None:
             # Simulation begins paused until start button in GUI pressed
             self.gui.updateLabels()
@@ -715,6 +948,9 @@ class Sugarscape:
         timesteps = timesteps - self.timestep
         screenshots = 0
         while t <= timesteps:
+            # Simulation ended from the GUI while paused
+            if self.gui != None and self.end == True:
+                break
             if len(self.agents) == 0 and self.keepAlive == False:
                 break
             if self.configuration["screenshots"] == True and self.configuration["headlessMode"] == False:
@@ -722,9 +958,34 @@ class Sugarscape:
                 screenshots += 1
             self.doTimestep()
             t += 1
+            if self.timestep == self.forkTimestep and len(self.forkConfigurations) > 0 and self.end == False:
+                # Continuations finish the simulation in place of the warm-up
+                return self.forkSimulations()
             if self.gui != None and self.run == False:
                 self.pauseSimulation()
         self.endSimulation()
+        return 0
+
+    def runForkedSimulation(self, forkNumber, logPosition):
+        exitCode = 1
+        try:
+            self.configureForkedSimulation(forkNumber, logPosition)
+            exitCode = self.runSimulation(self.maxTimestep)
+        except Exception:
+            traceback.print_exc()
+        sys.stdout.flush()
+        return exitCode
+
+    def saveCheckpoint(self):
+        logPosition = None
+        if self.log != None:
+            self.log.flush()
+            logPosition = self.log.tell()
+        # Write to a temporary file so an interrupted checkpoint leaves the previous one intact
+        checkpointFile = gzip.open(f"{self.checkpointFile}.tmp", "wb", compresslevel=1)
+        self.writeCheckpoint(checkpointFile, logPosition)
+        checkpointFile.close()
+        os.replace(f"{self.checkpointFile}.tmp", self.checkpointFile)
 
     def startLog(self):
         if self.log == None:
@@ -744,6 +1005,30 @@ class Sugarscape:
         self.updateRuntimeStats()
         self.writeToLog()
 
+    def startSimulation(self):
+        # Simulations resumed from a checkpoint or already stepped have logged their earlier timesteps
+        if self.timestep == 0 and self.started == False:
+            self.startLog()
+            if self.log == None:
+                self.updateRuntimeStats()
+        self.started = True
+
+    def stepSimulation(self, timesteps=1):
+        # Advance without ending the simulation so it can be stepped again, recording the statistics of every timestep
+        if self.started == False:
+            self.startSimulation()
+            self.runtimeStatsHistory.append(dict(self.runtimeStats))
+        steppedTimesteps = 0
+        while steppedTimesteps < timesteps:
+            if self.end == True or (len(self.agents) == 0 and self.keepAlive == False):
+                break
+            self.doTimestep()
+            if self.end == True:
+                break
+            self.runtimeStatsHistory.append(dict(self.runtimeStats))
+            steppedTimesteps += 1
+        return steppedTimesteps
+
     def toggleEnd(self):
         self.end = True
 
@@ -928,11 +1213,16 @@ class Sugarscape:
         remainingTribes = 0
         tribes = {}
 
-        for agent in self.agents:
+        # Stored agents find their times to live together
+        agentTimesToLive = self.agentStore.findAgentTimesToLive(self.agents) if self.agentStore != None else None
+        for i, agent in enumerate(self.agents):
             if group != None and agent.isInGroup(group, notInGroup) == False:
                 continue
-            agentTimeToLive = agent.findTimeToLive()
-            agentTimeToLiveAgeLimited = agent.findTimeToLive(True)
+            if agentTimesToLive != None:
+                agentTimeToLive, agentTimeToLiveAgeLimited = agentTimesToLive[i]
+            else:
+                agentTimeToLive = agent.findTimeToLive()
+                agentTimeToLiveAgeLimited = agent.findTimeToLive(True)
             agentWealth = agent.sugar + agent.spice
             meanSelfishness += agent.selfishnessFactor
             meanSugarMetabolism += agent.sugarMetabolism
@@ -1186,6 +1476,17 @@ class Sugarscape:
         for key in runtimeStats.keys():
             self.runtimeStats[key] = runtimeStats[key]
 
+    def updateTimingStats(self):
+        phaseTimes = self.timer.findPhaseTimes()
+        for phase in timing.timestepPhases:
+            self.runtimeStats[timing.timestepPhaseStats[phase]] = phaseTimes[phase]
+
+    def writeCheckpoint(self, file, logPosition):
+        state = {attribute: value for attribute, value in self.__dict__.items() if attribute not in ("gui", "log")}
+        pickler = checkpoint.CheckpointPickler(file, self)
+        pickler.dump({"logPosition": logPosition, "state": state})
+        pickler.dumpObjects()
+
     def writeToLog(self):
         if self.log == None:
             return
@@ -1205,9 +1506,143 @@ class Sugarscape:
         string = f"{str(self.environment)}Seed: {self.seed}\nTimestep: {self.timestep}\nLiving Agents: {len(self.agents)}"
         return string
 
-def parseConfiguration(configFile, configuration):
-    file = open(configFile)
-    options = json.loads(file.read())
+def createConfiguration(options, randomGenerator=None):
+    configuration = mergeConfiguration(createDefaultConfiguration(), options)
+    # Simulations created outside the command line run without an interface
+    configuration["headlessMode"] = True
+    configuration["profileMode"] = False
+    return verifyConfiguration(configuration, randomGenerator)
+
+def createDefaultConfiguration():
+    # Set default values for simulation configuration
+    configuration = {"agentAggressionFactor": [0, 0],
+                     "agentArrayStore": False,
+                     "agentBaseInterestRate": [0.0, 0.0],
+                     "agentDecisionModels": ["none"],
+                     "agentDecisionModel": None,
+                     "agentDecisionModelFactor": [0, 0],
+                     "agentDecisionModelLookaheadDiscount": [0, 0],
+                     "agentDecisionModelLookaheadFactor": [0],
+                     "agentDecisionModelTribalFactor": [-1, -1],
+                     "agentDepressionPercentage": 0,
+                     "agentDiseaseProtectionChance": [0.0, 0.0],
+                     "agentFemaleInfertilityAge": [0, 0],
+                     "agentFemaleFertilityAge": [0, 0],
+                     "agentFertilityFactor": [0, 0],
+                     "agentImmuneSystemLength": 0,
+                     "agentInheritancePolicy": "none",
+                     "agentLeader": False,
+                     "agentLendingFactor": [0, 0],
+                     "agentLoanDuration": [0, 0],
+                     "agentLookaheadFactor": [0, 0],
+                     "agentMaleInfertilityAge": [0, 0],
+                     "agentMaleFertilityAge": [0, 0],
+                     "agentMaleToFemaleRatio": 1.0,
+                     "agentMaxAge": [-1, -1],
+                     "agentMaxFriends": [0, 0],
+                     "agentMovement": [1, 6],
+                     "agentMovementMode": "cardinal",
+                     "agentReplacements": 0,
+                     "agentSelfishnessFactor": [-1, -1],
+                     "agentSpiceMetabolism": [0, 0],
+                     "agentStartingSpice": [0, 0],
+                     "agentStartingSugar": [10, 40],
+                     "agentSugarMetabolism": [1, 4],
+                     "agentTagging": False,
+                     "agentTagPreferences": False,
+                     "agentTagStringLength": 0,
+                     "agentTradeBisection": False,
+                     "agentTradeFactor": [0, 0],
+                     "agentUniversalSpice": [0,0],
+                     "agentUniversalSugar": [0,0],
+                     "agentVision": [1, 6],
+                     "agentVisionMode": "cardinal",
+                     "checkpointFile": None,
+                     "checkpointInterval": 0,
+                     "checkpointResume": False,
+                     "debugMode": ["none"],
+                     "diseaseAggressionPenalty": [0, 0],
+                     "diseaseFertilityPenalty": [0, 0],
+                     "diseaseFriendlinessPenalty": [0, 0],
+                     "diseaseHappinessPenalty": [0,0],
+                     "diseaseIncubationPeriod": [0, 0],
+                     "diseaseList": [],
+                     "diseaseMovementPenalty": [0, 0],
+                     "diseaseSpiceMetabolismPenalty": [0, 0],
+                     "diseaseSugarMetabolismPenalty": [0, 0],
+                     "diseaseTagStringLength": [0, 0],
+                     "diseaseTimeframe": [0, 0],
+                     "diseaseTransmissionChance": [1.0, 1.0],
+                     "diseaseVisionPenalty": [0, 0],
+                     "environmentArrayGrid": False,
+                     "environmentEquator": -1,
+                     "environmentHeight": 50,
+                     "environmentMaxCombatLoot": 0,
+                     "environmentMaxSpice": 0,
+                     "environmentMaxSugar": 4,
+                     "environmentMaxTribes": 0,
+                     "environmentPollutionDiffusionDelay": 0,
+                     "environmentPollutionDiffusionTimeframe": [0, 0],
+                     "environmentPollutionTimeframe": [0, 0],
+                     "environmentQuadrantSizeFactor": 1,
+                     "environmentSeasonalGrowbackDelay": 0,
+                     "environmentSeasonInterval": 0,
+                     "environmentSpiceConsumptionPollutionFactor": 0,
+                     "environmentSpicePeaks": [[35, 35], [15, 15]],
+                     "environmentSpiceProductionPollutionFactor": 0,
+                     "environmentSpiceRegrowRate": 0,
+                     "environmentStartingQuadrants": [1, 2, 3, 4],
+                     "environmentSugarConsumptionPollutionFactor": 0,
+                     "environmentSugarPeaks": [[35, 15], [15, 35]],
+                     "environmentSugarProductionPollutionFactor": 0,
+                     "environmentSugarRegrowRate": 1,
+                     "environmentTribePerQuadrant": False,
+                     "environmentUniversalSpiceIncomeInterval": 0,
+                     "environmentUniversalSugarIncomeInterval": 0,
+                     "environmentWidth": 50,
+                     "environmentWraparound": True,
+                     "experimentalGroup": None,
+                     "forkConfigurations": [],
+                     "forkTimestep": 0,
+                     "headlessMode": False,
+                     "interfaceHeight": 1000,
+                     "interfaceWidth": 900,
+                     "keepAlivePostExtinction": False,
+                     "logfile": None,
+                     "logfileFormat": "json",
+                     "neighborhoodMode": "vonNeumann",
+                     "profileMode": False,
+                     "screenshots": False,
+                     "seed": -1,
+                     "startingAgents": 250,
+                     "startingDiseases": 0,
+                     "startingDiseasesPerAgent": [0, 0],
+                     "timesteps": 200,
+                     "timingMode": "none"
+                     }
+    return configuration
+
+def createSimulation(configuration, geometryCache=None, randomGenerator=None):
+    # Simulations resumed from a checkpoint continue drawing from the random number generator saved with them
+    if configuration["checkpointResume"] == True and os.path.exists(configuration["checkpointFile"]):
+        return loadCheckpoint(configuration["checkpointFile"])
+    # Without a checkpoint to resume from, any partial log from an earlier attempt is started over
+    if configuration["checkpointResume"] == True and configuration["logfile"] != None:
+        open(configuration["logfile"], 'w').close()
+    return Sugarscape(configuration, geometryCache, randomGenerator)
+
+def loadCheckpoint(checkpointFile):
+    file = gzip.open(checkpointFile, "rb")
+    S, logPosition = readCheckpoint(file)
+    file.close()
+    if S.configuration["logfile"] != None:
+        # Discard anything logged after the checkpoint was taken
+        S.log = open(S.configuration["logfile"], 'a')
+        S.log.truncate(logPosition)
+    S.gui = gui.GUI(S, S.configuration["interfaceHeight"], S.configuration["interfaceWidth"]) if S.configuration["headlessMode"] == False else None
+    return S
+
+def mergeConfiguration(configuration, options):
     # If using the top-level config file, access correct JSON object
     if "sugarscapeOptions" in options:
         options = options["sugarscapeOptions"]
@@ -1224,16 +1659,23 @@ def parseConfiguration(configFile, configuration):
             configuration[opt] = options[opt]
     return configuration
 
+def parseConfiguration(configFile, configuration):
+    file = open(configFile)
+    options = json.loads(file.read())
+    file.close()
+    return mergeConfiguration(configuration, options)
+
 def parseOptions(configuration):
     commandLineArgs = sys.argv[1:]
-    shortOptions = "c:h:"
-    longOptions = ["conf=", "help"]
+    shortOptions = "c:rh:"
+    longOptions = ["conf=", "resume", "help"]
     try:
         args, vals = getopt.getopt(commandLineArgs, shortOptions, longOptions)
     except getopt.GetoptError as err:
         print(err)
         printHelp()
     nextArg = 0
+    resume = False
     for currArg, currVal in args:
         nextArg += 1
         if currArg in("-c", "--conf"):
@@ -1241,14 +1683,29 @@ def parseOptions(configuration):
                 print("No config file provided.")
                 printHelp()
             parseConfiguration(currVal, configuration)
+        elif currArg in ("-r", "--resume"):
+            resume = True
         elif currArg in ("-h", "--help"):
             printHelp()
+    # Command line flag takes precedence over the configuration file
+    if resume == True:
+        configuration["checkpointResume"] = True
     return configuration
 
 def printHelp():
-    print("Usage:\n\tpython sugarscape.py --conf config.json\n\nOptions:\n\t-c,--conf\tUse specified config file for simulation settings.\n\t-h,--help\tDisplay this message.")
+    print("Usage:\n\tpython sugarscape.py --conf config.json\n\nOptions:\n\t-c,--conf\tUse specified config file for simulation settings.\n\t-r,--resume\tResume the simulation from its checkpoint file if one exists.\n\t-h,--help\tDisplay this message.")
     exit(0)
 
+def readCheckpoint(file):
+    S = Sugarscape.__new__(Sugarscape)
+    unpickler = checkpoint.CheckpointUnpickler(file, S)
+    header = unpickler.load()
+    unpickler.loadObjects()
+    S.__dict__.update(header["state"])
+    S.gui = None
+    S.log = None
+    return S, header["logPosition"]
+
 def sortConfigurationTimeframes(configuration, timeframe):
     config = configuration[timeframe]
     if configuration != [0, 0]:
@@ -1274,7 +1731,12 @@ def sortConfigurationTimeframes(configuration, timeframe):
         config = [start, end]
     return config
 
-def verifyConfiguration(configuration):
+def verifyConfiguration(configuration, randomGenerator=None):
+    # Randomized options are drawn from a generator seeded by the configuration unless one is given, leaving the global random state untouched
+    if randomGenerator == None:
+        if configuration["seed"] == -1:
+            configuration["seed"] = random.Random().randrange(sys.maxsize)
+        randomGenerator = random.Random(configuration["seed"])
     negativesAllowed = ["agentDecisionModelTribalFactor", "agentMaxAge", "agentSelfishnessFactor"]
     negativesAllowed += ["diseaseAggressionPenalty", "diseaseFertilityPenalty", "diseaseMovementPenalty", "diseaseSpiceMetabolismPenalty", "diseaseSugarMetabolismPenalty", "diseaseTimeframe", "diseaseVisionPenalty"]
     negativesAllowed += ["environmentEquator", "environmentPollutionDiffusionTimeframe", "environmentPollutionTimeframe", "environmentMaxSpice", "environmentMaxSugar"]
@@ -1283,7 +1745,7 @@ def verifyConfiguration(configuration):
     negativeFlag = 0
     for configName, configValue in configuration.items():
         if isinstance(configValue, list):
-            if len(configValue) == 0:
+            if len(configValue) == 0 or configName == "forkConfigurations":
                 continue
             configType = type(configValue[0])
             if configName in timeframes:
@@ -1303,36 +1765,30 @@ def verifyConfiguration(configuration):
     if negativeFlag > 0:
         print(f"Detected negative values provided for {negativeFlag} option(s). Setting these values to zero.")
 
-    # If no specific disease is tracked, revert to generic sick experimental group
-    if configuration["experimentalGroup"] != None and "disease" in configuration["experimentalGroup"]:
-            experimentalDiseaseID = re.search(r"disease(?P<ID>\d+)", configuration["experimentalGroup"])
-            if experimentalDiseaseID == None:
-                configuration["experimentalGroup"] = "sick"
-
     if configuration["environmentMaxSpice"] < 0:
-        configuration["environmentMaxSpice"] = random.randint(1, 10)
+        configuration["environmentMaxSpice"] = randomGenerator.randint(1, 10)
     if configuration["environmentMaxSugar"] < 0:
-        configuration["environmentMaxSugar"] = random.randint(1, 10)
+        configuration["environmentMaxSugar"] = randomGenerator.randint(1, 10)
     for peak in configuration["environmentSpicePeaks"]:
         if len(peak) < 3:
-            peak.append(random.randint(1, configuration["environmentMaxSpice"]))
+            peak.append(randomGenerator.randint(1, configuration["environmentMaxSpice"]) if configuration["environmentMaxSpice"] > 0 else 0)
         if peak[0] < 0:
-            peak[0] = random.randint(0, configuration["environmentWidth"] - 1)
+            peak[0] = randomGenerator.randint(0, configuration["environmentWidth"] - 1)
         if peak[1] < 0:
-            peak[1] = random.randint(0, configuration["environmentHeight"] - 1)
+            peak[1] = randomGenerator.randint(0, configuration["environmentHeight"] - 1)
         if len(peak) < 3 or peak[2] < 0:
-            peak[2] = random.randint(1, configuration["environmentMaxSpice"])
+            peak[2] = randomGenerator.randint(1, configuration["environmentMaxSpice"]) if configuration["environmentMaxSpice"] > 0 else 0
         elif peak[2] > configuration["environmentMaxSpice"]:
             peak[2] = configuration["environmentMaxSpice"]
     for peak in configuration["environmentSugarPeaks"]:
         if len(peak) < 3:
-            peak.append(random.randint(1, configuration["environmentMaxSugar"]))
+            peak.append(randomGenerator.randint(1, configuration["environmentMaxSugar"]) if configuration["environmentMaxSugar"] > 0 else 0)
         if peak[0] < 0:
-            peak[0] = random.randint(0, configuration["environmentWidth"] - 1)
+            peak[0] = randomGenerator.randint(0, configuration["environmentWidth"] - 1)
         if peak[1] < 0:
-            peak[1] = random.randint(0, configuration["environmentHeight"] - 1)
+            peak[1] = randomGenerator.randint(0, configuration["environmentHeight"] - 1)
         if peak[2] < 0:
-            peak[2] = random.randint(1, configuration["environmentMaxSugar"])
+            peak[2] = randomGenerator.randint(1, configuration["environmentMaxSugar"]) if configuration["environmentMaxSugar"] > 0 else 0
         elif peak[2] > configuration["environmentMaxSugar"]:
             peak[2] = configuration["environmentMaxSugar"]
 
@@ -1341,6 +1797,16 @@ def verifyConfiguration(configuration):
             print(f"Cannot have a quadrant size factor of {configuration['environmentQuadrantSizeFactor']}. Setting quadrant size factor to 1.")
         configuration["environmentQuadrantSizeFactor"] = 1
 
+    if configuration["environmentArrayGrid"] == True and environment.numpy == None:
+        if "all" in configuration["debugMode"] or "environment" in configuration["debugMode"]:
+            print("Cannot use an array-backed environment grid without NumPy. Disabling array-backed environment grid.")
+        configuration["environmentArrayGrid"] = False
+
+    if configuration["agentArrayStore"] == True and agentstore.numpy == None:
+        if "all" in configuration["debugMode"] or "agent" in configuration["debugMode"]:
+            print("Cannot use an array-backed agent store without NumPy. Disabling array-backed agent store.")
+        configuration["agentArrayStore"] = False
+
     if len(configuration["environmentStartingQuadrants"]) == 0:
         configuration["environmentStartingQuadrants"] = [1, 2, 3, 4]
 
@@ -1422,13 +1888,7 @@ def verifyConfiguration(configuration):
             print(f"Cannot provide {configuration['environmentMaxTribes']} tribes. Allocating maximum of {maxColors}.")
         configuration["environmentMaxTribes"] = maxColors
 
-    # Ensure experimental group is properly defined or otherwise ignored
-    if configuration["experimentalGroup"] == "":
-        configuration["experimentalGroup"] = None
-    elif configuration["experimentalGroup"] != None and configuration["experimentalGroup"] not in ["depressed", "female", "male", "sick"] and "disease" not in configuration["experimentalGroup"]:
-        if "all" in configuration["debugMode"] or "agent" in configuration["debugMode"]:
-            print(f"Cannot provide separate log stats for experimental group {configuration['experimentalGroup']}. Disabling separate log stats.")
-        configuration["experimentalGroup"] = None
+    configuration["experimentalGroup"] = verifyExperimentalGroup(configuration["experimentalGroup"], configuration["debugMode"])
 
     # Ensure the most number of starting diseases per agent is equal to total starting diseases in the environment
     if configuration["startingDiseasesPerAgent"] != [0, 0]:
@@ -1443,8 +1903,40 @@ def verifyConfiguration(configuration):
     if configuration["logfile"] == "":
         configuration["logfile"] = None
 
+    if configuration["checkpointFile"] == "":
+        configuration["checkpointFile"] = None
+    if configuration["checkpointFile"] == None and (configuration["checkpointInterval"] > 0 or configuration["checkpointResume"] == True):
+        checkpointFile = f"{configuration['logfile']}.checkpoint" if configuration["logfile"] != None else "sugarscape.checkpoint"
+        if "all" in configuration["debugMode"] or "sugarscape" in configuration["debugMode"]:
+            print(f"No checkpoint file provided. Setting checkpoint file to {checkpointFile}.")
+        configuration["checkpointFile"] = checkpointFile
+
+    # Forked simulations can only override options the simulation recognizes
+    for forkConfiguration in configuration["forkConfigurations"]:
+        for option in [option for option in forkConfiguration if option not in configuration]:
+            if "all" in configuration["debugMode"] or "sugarscape" in configuration["debugMode"]:
+                print(f"Cannot override unrecognized option {option} in a forked simulation. Ignoring option.")
+            del forkConfiguration[option]
+        # Forks log to copies of the warm-up log, which needs to know the experimental groups they log
+        if "experimentalGroup" in forkConfiguration:
+            forkConfiguration["experimentalGroup"] = verifyExperimentalGroup(forkConfiguration["experimentalGroup"], configuration["debugMode"])
+    if len(configuration["forkConfigurations"]) > 0 and (configuration["forkTimestep"] == 0 or configuration["forkTimestep"] >= configuration["timesteps"]):
+        if "all" in configuration["debugMode"] or "sugarscape" in configuration["debugMode"]:
+            print(f"Cannot fork simulations at timestep {configuration['forkTimestep']}. Disabling forked simulations.")
+        configuration["forkConfigurations"] = []
+    # Forked processes cannot share the connection of a graphical interface
+    if len(configuration["forkConfigurations"]) > 0 and configuration["headlessMode"] == False:
+        if "all" in configuration["debugMode"] or "sugarscape" in configuration["debugMode"]:
+            print("Cannot fork simulations with a graphical interface. Disabling forked simulations.")
+        configuration["forkConfigurations"] = []
+
     if configuration["seed"] == -1:
-        configuration["seed"] = random.randrange(sys.maxsize)
+        configuration["seed"] = randomGenerator.randrange(sys.maxsize)
+
+    if configuration["timingMode"] not in ["log", "none", "summary"]:
+        if "all" in configuration["debugMode"] or "sugarscape" in configuration["debugMode"]:
+            print(f"Timing mode {configuration['timingMode']} not recognized. Disabling phase timing.")
+        configuration["timingMode"] = "none"
 
     recognizedDebugModes = ["agent", "all", "cell", "disease", "environment", "ethics", "none", "sugarscape"]
     validModes = True
@@ -1472,119 +1964,39 @@ def verifyConfiguration(configuration):
             configuration["agentDecisionModels"] = [configuration["agentDecisionModels"]]
     return configuration
 
+def verifyExperimentalGroup(experimentalGroup, debugMode):
+    # If no specific disease is tracked, revert to generic sick experimental group
+    if experimentalGroup != None and "disease" in experimentalGroup:
+            experimentalDiseaseID = re.search(r"disease(?P<ID>\d+)", experimentalGroup)
+            if experimentalDiseaseID == None:
+                experimentalGroup = "sick"
+
+    # Ensure experimental group is properly defined or otherwise ignored
+    if experimentalGroup == "":
+        experimentalGroup = None
+    elif experimentalGroup != None and experimentalGroup not in ["depressed", "female", "male", "sick"] and "disease" not in experimentalGroup:
+        if "all" in debugMode or "agent" in debugMode:
+            print(f"Cannot provide separate log stats for experimental group {experimentalGroup}. Disabling separate log stats.")
+        experimentalGroup = None
+    return experimentalGroup
+
 if __name__ == "__main__":
-    # Set default values for simulation configuration
-    configuration = {"agentAggressionFactor": [0, 0],
-                     "agentBaseInterestRate": [0.0, 0.0],
-                     "agentDecisionModels": ["none"],
-                     "agentDecisionModel": None,
-                     "agentDecisionModelFactor": [0, 0],
-                     "agentDecisionModelLookaheadDiscount": [0, 0],
-                     "agentDecisionModelLookaheadFactor": [0],
-                     "agentDecisionModelTribalFactor": [-1, -1],
-                     "agentDepressionPercentage": 0,
-                     "agentDiseaseProtectionChance": [0.0, 0.0],
-                     "agentFemaleInfertilityAge": [0, 0],
-                     "agentFemaleFertilityAge": [0, 0],
-                     "agentFertilityFactor": [0, 0],
-                     "agentImmuneSystemLength": 0,
-                     "agentInheritancePolicy": "none",
-                     "agentLeader": False,
-                     "agentLendingFactor": [0, 0],
-                     "agentLoanDuration": [0, 0],
-                     "agentLookaheadFactor": [0, 0],
-                     "agentMaleInfertilityAge": [0, 0],
-                     "agentMaleFertilityAge": [0, 0],
-                     "agentMaleToFemaleRatio": 1.0,
-                     "agentMaxAge": [-1, -1],
-                     "agentMaxFriends": [0, 0],
-                     "agentMovement": [1, 6],
-                     "agentMovementMode": "cardinal",
-                     "agentReplacements": 0,
-                     "agentSelfishnessFactor": [-1, -1],
-                     "agentSpiceMetabolism": [0, 0],
-                     "agentStartingSpice": [0, 0],
-                     "agentStartingSugar": [10, 40],
-                     "agentSugarMetabolism": [1, 4],
-                     "agentTagging": False,
-                     "agentTagPreferences": False,
-                     "agentTagStringLength": 0,
-                     "agentTradeFactor": [0, 0],
-                     "agentUniversalSpice": [0,0],
-                     "agentUniversalSugar": [0,0],
-                     "agentVision": [1, 6],
-                     "agentVisionMode": "cardinal",
-                     "debugMode": ["none"],
-                     "diseaseAggressionPenalty": [0, 0],
-                     "diseaseFertilityPenalty": [0, 0],
-                     "diseaseFriendlinessPenalty": [0, 0],
-                     "diseaseHappinessPenalty": [0,0],
-                     "diseaseIncubationPeriod": [0, 0],
-                     "diseaseList": [],
-                     "diseaseMovementPenalty": [0, 0],
-                     "diseaseSpiceMetabolismPenalty": [0, 0],
-                     "diseaseSugarMetabolismPenalty": [0, 0],
-                     "diseaseTagStringLength": [0, 0],
-                     "diseaseTimeframe": [0, 0],
-                     "diseaseTransmissionChance": [1.0, 1.0],
-                     "diseaseVisionPenalty": [0, 0],
-                     "environmentEquator": -1,
-                     "environmentHeight": 50,
-                     "environmentMaxCombatLoot": 0,
-                     "environmentMaxSpice": 0,
-                     "environmentMaxSugar": 4,
-                     "environmentMaxTribes": 0,
-                     "environmentPollutionDiffusionDelay": 0,
-                     "environmentPollutionDiffusionTimeframe": [0, 0],
-                     "environmentPollutionTimeframe": [0, 0],
-                     "environmentQuadrantSizeFactor": 1,
-                     "environmentSeasonalGrowbackDelay": 0,
-                     "environmentSeasonInterval": 0,
-                     "environmentSpiceConsumptionPollutionFactor": 0,
-                     "environmentSpicePeaks": [[35, 35], [15, 15]],
-                     "environmentSpiceProductionPollutionFactor": 0,
-                     "environmentSpiceRegrowRate": 0,
-                     "environmentStartingQuadrants": [1, 2, 3, 4],
-                     "environmentSugarConsumptionPollutionFactor": 0,
-                     "environmentSugarPeaks": [[35, 15], [15, 35]],
-                     "environmentSugarProductionPollutionFactor": 0,
-                     "environmentSugarRegrowRate": 1,
-                     "environmentTribePerQuadrant": False,
-                     "environmentUniversalSpiceIncomeInterval": 0,
-                     "environmentUniversalSugarIncomeInterval": 0,
-                     "environmentWidth": 50,
-                     "environmentWraparound": True,
-                     "experimentalGroup": None,
-                     "headlessMode": False,
-                     "interfaceHeight": 1000,
-                     "interfaceWidth": 900,
-                     "keepAlivePostExtinction": False,
-                     "logfile": None,
-                     "logfileFormat": "json",
-                     "neighborhoodMode": "vonNeumann",
-                     "profileMode": False,
-                     "screenshots": False,
-                     "seed": -1,
-                     "startingAgents": 250,
-                     "startingDiseases": 0,
-                     "startingDiseasesPerAgent": [0, 0],
-                     "timesteps": 200
-                     }
+    configuration = createDefaultConfiguration()
     configuration = parseOptions(configuration)
     configuration = verifyConfiguration(configuration)
     if configuration["headlessMode"] == False:
         import gui
-    random.seed(configuration["seed"])
-    S = Sugarscape(configuration)
+    S = createSimulation(configuration)
+    exitCode = 0
     if configuration["profileMode"] == True:
         import cProfile
         import tracemalloc
         tracemalloc.start()
-        cProfile.run("S.runSimulation(configuration[\"timesteps\"])")
+        cProfile.run("exitCode = S.runSimulation(configuration[\"timesteps\"])")
         snapshot = tracemalloc.take_snapshot()
         memoryStats = snapshot.statistics("lineno", True)
         for stat in memoryStats[:100]:
             print(stat)
     else:
-        S.runSimulation(configuration["timesteps"])
-    exit(0)
+        exitCode = S.runSimulation(configuration["timesteps"])
+    exit(exitCode)
@@ -40,6 +40,8 @@ config['sugarscapeOptions']['seed'] = $SEED
 config['sugarscapeOptions']['agentDecisionModels'] = ['$MODEL_NAME']
 config['sugarscapeOptions']['logfile'] = '$OUTPUT_PATH'
 config['sugarscapeOptions']['logfileFormat'] = 'json'
+config['sugarscapeOptions']['checkpointFile'] = '$OUTPUT_PATH.checkpoint'
+config['sugarscapeOptions']['checkpointInterval'] = 250
 with open('$JOB_JSON', 'w') as f: json.dump(config, f, indent=2)
 print('Created config for model: $MODEL_NAME, seed: $SEED')
 "
@@ -50,8 +52,8 @@ if [[ ! -f "$JOB_JSON" ]]; then
     exit 1
 fi
 
-# Run the simulation
-python3 ~/sugarscape/sugarscape.py --conf "$JOB_JSON"
+# Run the simulation, continuing from the last checkpoint if an earlier attempt was cut short
+python3 ~/sugarscape/sugarscape.py --conf "$JOB_JSON" --resume
 
 # Check if simulation completed successfully
 if [[ $? -ne 0 ]]; then
@@ -0,0 +1,47 @@
+import time
+
+# Phases are listed in the order they run within a timestep
+timestepPhases = ("environment", "diseaseIntroduction", "agentOverhead", "agentMovement", "agentCollection", "agentMetabolism", "agentTagging", "agentTrading",
+                  "agentReproduction", "agentLending", "agentDisease", "agentAging", "agentHappiness", "deadAgentRemoval", "agentReplacement",
+                  "runtimeStats", "gui", "logging")
+# Log entries name the time of each phase in the Pythonic case scheme of other runtime statistics
+timestepPhaseStats = {phase: f"time{phase[0].upper()}{phase[1:]}" for phase in timestepPhases}
+
+class PhaseTimer:
+    def __init__(self):
+        self.lastLap = time.perf_counter()
+        self.timesteps = 0
+        self.totalPhaseTimes = {phase: 0 for phase in timestepPhases}
+        self.unreportedPhaseTimes = {phase: 0 for phase in timestepPhases}
+
+    def endTimestep(self):
+        self.timesteps += 1
+
+    def findPhaseTimes(self):
+        # Phase times since the previous report, so every lap is reported exactly once
+        phaseTimes = self.unreportedPhaseTimes
+        self.unreportedPhaseTimes = {phase: 0 for phase in timestepPhases}
+        return phaseTimes
+
+    def findSummary(self):
+        totalTime = sum(self.totalPhaseTimes.values())
+        summary = f"{'Phase':<24}{'Total (s)':>12}{'Per timestep (ms)':>20}{'Share':>10}\n"
+        for phase in timestepPhases:
+            phaseTime = self.totalPhaseTimes[phase]
+            meanTime = phaseTime * 1000 / self.timesteps if self.timesteps > 0 else 0
+            share = phaseTime * 100 / totalTime if totalTime > 0 else 0
+            summary += f"{phase:<24}{phaseTime:>12.3f}{meanTime:>20.3f}{share:>9.1f}%\n"
+        meanTotalTime = totalTime * 1000 / self.timesteps if self.timesteps > 0 else 0
+        summary += f"{'total':<24}{totalTime:>12.3f}{meanTotalTime:>20.3f}{100 if totalTime > 0 else 0:>9.1f}%"
+        return summary
+
+    def lap(self, phase):
+        # Charge the time since the previous lap to the given phase
+        currentLap = time.perf_counter()
+        lapTime = currentLap - self.lastLap
+        self.lastLap = currentLap
+        self.totalPhaseTimes[phase] += lapTime
+        self.unreportedPhaseTimes[phase] += lapTime
+
+    def startTimestep(self):
+        self.lastLap = time.perf_counter()